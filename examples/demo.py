@@ -13,6 +13,7 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, PROJECT_ROOT)
 
 # 导入模块
+from src.data.stock_api import StockDataAPI
 from src.strategies.ai_stock_picker import AIStockPicker
 from src.utils.risk_manager import RiskManager
 from src.utils.logger import setup_logger
@@ -20,14 +21,14 @@ from src.utils.logger import setup_logger
 logger = setup_logger(__name__)
 
 
-def demo_ai_picker():
+def demo_ai_picker(api: StockDataAPI):
     """演示AI选股"""
     print("\n" + "=" * 70)
     print("🤖 AI智能选股演示")
     print("=" * 70)
     
     # 创建AI选股器
-    picker = AIStockPicker()
+    picker = AIStockPicker(api)
     
     # 候选股票池
     stock_pool = [
@@ -123,16 +124,14 @@ def demo_portfolio():
     print(f"   风险等级: {status['risk_level']}")
 
 
-def demo_technical():
+def demo_technical(api: StockDataAPI):
     """演示技术指标"""
     print("\n" + "=" * 70)
     print("📊 技术指标演示")
     print("=" * 70)
     
     from src.utils.technical_analysis import TechnicalAnalyzer
-    from src.data.stock_api import StockDataAPI
     
-    api = StockDataAPI(data_source="sina")
     analyzer = TechnicalAnalyzer()
     
     test_symbols = ["600519", "000001", "300750"]
@@ -160,14 +159,17 @@ def main():
     print(f"\n📁 项目路径: {PROJECT_ROOT}")
     
     try:
+        # 所有演示共用一个数据接口
+        api = StockDataAPI(data_source="sina")
+        
         # 1. AI选股演示
-        demo_ai_picker()
+        demo_ai_picker(api)
         
         # 2. 组合管理演示
         demo_portfolio()
         
         # 3. 技术指标演示
-        demo_technical()
+        demo_technical(api)
         
         print("\n" + "=" * 70)
         print("✅ 演示完成!")
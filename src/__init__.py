@@ -3,12 +3,23 @@
 量化交易系统 - 核心代码
 """
 
+import importlib
+
 __version__ = "1.0.0"
 __author__ = "丁明旭"
 
-from .data.stock_api import StockDataAPI, StockScreener
-from .strategies.ai_stock_picker import AIStockPicker, StrategyPortfolio
-from .utils.technical_analysis import TechnicalAnalyzer, TechnicalIndicators, TrendType, SignalType
+# 按需导入（PEP 562），import src 时不加载 pandas/numpy/requests
+_LAZY = {
+    'StockDataAPI': ('.data.stock_api', 'StockDataAPI'),
+    'StockScreener': ('.data.stock_api', 'StockScreener'),
+    'AIStockPicker': ('.strategies.ai_stock_picker', 'AIStockPicker'),
+    'StrategyPortfolio': ('.strategies.ai_stock_picker', 'StrategyPortfolio'),
+    'TechnicalAnalyzer': ('.utils.technical_analysis', 'TechnicalAnalyzer'),
+    'IncrementalTechnicalAnalyzer': ('.utils.technical_analysis', 'IncrementalTechnicalAnalyzer'),
+    'TechnicalIndicators': ('.utils.technical_analysis', 'TechnicalIndicators'),
+    'TrendType': ('.utils.technical_analysis', 'TrendType'),
+    'SignalType': ('.utils.technical_analysis', 'SignalType'),
+}
 
 __all__ = [
     'StockDataAPI',
@@ -16,7 +27,21 @@ __all__ = [
     'AIStockPicker',
     'StrategyPortfolio',
     'TechnicalAnalyzer',
+    'IncrementalTechnicalAnalyzer',
     'TechnicalIndicators',
     'TrendType',
     'SignalType',
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        module, attr = _LAZY[name]
+        value = getattr(importlib.import_module(module, __name__), attr)
+        globals()[name] = value  # 缓存，后续访问不再经过 __getattr__
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY))
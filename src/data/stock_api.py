@@ -3,29 +3,225 @@
 """
 股票数据获取模块
 支持多种数据源：Tushare、免费新浪接口
+
+在项目根目录以模块方式运行演示（模块使用包内相对导入，不能直接运行文件）：
+    python -m src.data.stock_api
 """
 
 import os
-import sys
+import re
 import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from typing import Optional, Dict, List, Any
+from collections import namedtuple, OrderedDict
+from functools import lru_cache
+from operator import itemgetter
+from datetime import date, datetime, timedelta
+from typing import Optional, Dict, List, Any, Tuple
 import requests
 import logging
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-# 添加项目根目录到路径
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    import aiohttp
+except ImportError:  # aiohttp 可选，未安装时退回 requests 逐只请求
+    aiohttp = None
 
-from utils.logger import setup_logger
+from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# 单日行情（新浪接口只能提供当日数据，无需构造 DataFrame）
+Quote = namedtuple('Quote', 'trade_date open high low close pre_close vol amount')
+
+SINA_HEADERS = {"Referer": "https://finance.sina.com.cn"}
+
+# 单次行情请求最多包含的股票数（控制 URL 长度）
+QUOTE_BATCH_SIZE = 80
+
+# 并发取日线数据的线程数（与连接池大小匹配）
+MAX_WORKERS = 16
+
+# 异步批量取数时同时在途的请求上限，避免触发数据源限流
+MAX_CONCURRENCY = 32
+
+# 日线数据内存缓存的条目上限（按最近使用淘汰）
+MEMORY_CACHE_SIZE = 512
+
+# 日线数据磁盘缓存目录（按交易日失效）
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "stock_api")
+
+
+@lru_cache(maxsize=16384)
+def _to_ts_code(symbol: str) -> str:
+    """股票代码转带市场前缀的代码（如 '600519' -> 'sh600519'）"""
+    return ("sh" if symbol[0] == "6" else "sz") + symbol
+
+
+def _quote_url(symbols: List[str]) -> str:
+    """批量行情请求地址（list=sh600519,sz000001,...）"""
+    return "https://hq.sinajs.cn/list=" + ",".join(map(_to_ts_code, symbols))
+
+
+def _batches(items: List[str], size: int):
+    """按 size 切分列表"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+@lru_cache(maxsize=1)
+def _default_dates(ordinal: int) -> Tuple[str, str]:
+    """某日对应的默认 (开始日期, 结束日期)：一年前与当日，YYYYMMDD"""
+    day = date.fromordinal(ordinal)
+    return (day - timedelta(days=365)).strftime("%Y%m%d"), day.strftime("%Y%m%d")
+
+
+def _today_str() -> str:
+    """当日日期 YYYYMMDD（按日缓存，跨日自动失效）"""
+    return _default_dates(date.today().toordinal())[1]
+
+
+def _has_running_loop() -> bool:
+    """当前线程是否已有运行中的事件循环（此时不能再 asyncio.run）"""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+# 新浪 hq 接口字段位置：名称 -> (下标, 换算表达式)，{} 处填入原始字段
+SINA_FIELDS = {
+    "name": (0, "{}"),
+    "open": (1, "float({})"),
+    "pre_close": (2, "float({})"),
+    "close": (3, "float({})"),
+    "high": (4, "float({})"),
+    "low": (5, "float({})"),
+    "volume": (8, "float({})"),
+    "vol": (8, "float({}) / 100.0"),         # 股 -> 手
+    "amount": (9, "float({})"),
+    "amount_wan": (9, "float({}) / 10000.0"),  # 元 -> 万元
+}
+
+
+def _make_sina_parser(fields: List[str], as_tuple: bool = False):
+    """
+    按固定字段表生成专用解析函数
+
+    生成的函数直接按下标取值，省去逐字段的字典查找与分支。
+
+    Args:
+        fields: 需要解析的字段名（见 SINA_FIELDS）
+        as_tuple: True 时返回元组，否则返回字典
+    """
+    exprs = [SINA_FIELDS[f][1].format(f"p[{SINA_FIELDS[f][0]}]") for f in fields]
+    if as_tuple:
+        body = "(" + "".join(f"{e}, " for e in exprs) + ")"
+    else:
+        body = "{" + ", ".join(f"{f!r}: {e}" for f, e in zip(fields, exprs)) + "}"
+    namespace = {}
+    exec(compile(f"def _parse(p):\n    return {body}\n", "<sina-parser>", "exec"), namespace)
+    return namespace["_parse"]
+
+
+# 实时行情字典中的数值字段（批量解析时按 SINA_FIELDS 的下标取值）
+_QUOTE_NUMERIC_FIELDS = ("open", "pre_close", "close", "high", "low", "volume", "amount")
+
+# 一行行情：代码、名称、下标 1-9 的数值字段，以及跳过 20 个字段后的日期(30)、时间(31)
+_SINA_RE = re.compile(
+    r'hq_str_(?P<code>\w+)="(?P<name>[^,"]*),'
+    r'(?P<nums>[^,"]+(?:,[^,"]+){8})'
+    r'(?:(?:,[^,"]*){20},(?P<date>[^,"]*),(?P<time>[^,"]*))?'
+)
+# 9 个数值字段均为合法数字（停牌等股票会出现 "--"）
+_SINA_NUMS_RE = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:,[-+]?(?:\d+\.?\d*|\.\d+)){8}')
+_parse_sina_daily = _make_sina_parser(
+    ["open", "high", "low", "close", "pre_close", "vol", "amount_wan"], as_tuple=True)
+
 
 class StockDataAPI:
     """股票数据统一接口"""
 
+    # 常用指数成分股 + 热门股票
+    _COMMON_CODES = {
+        # 热门股
+        "600519": "贵州茅台",
+        "000001": "平安银行",
+        "600036": "招商银行",
+        "601398": "工商银行",
+        "601988": "中国银行",
+        "600000": "浦发银行",
+        "300750": "宁德时代",
+        "002594": "比亚迪",
+        "300015": "爱尔眼科",
+        "000651": "格力电器",
+        "600276": "恒瑞医药",
+        "002475": "立讯精密",
+        "601012": "隆基绿能",
+        "600030": "中信证券",
+        "300059": "东方财富",
+        # 银行股
+        "601229": "上海银行",
+        "600919": "江苏银行",
+        "002142": "宁波银行",
+        "600908": "无锡银行",
+        "600928": "西安银行",
+        # 券商股
+        "600837": "海通证券",
+        "600999": "招商证券",
+        "601066": "中信建投",
+        "601788": "光大证券",
+        "600109": "国金证券",
+        # 医药股
+        "600436": "片仔癀",
+        "000513": "丽珠集团",
+        "600055": "万东医疗",
+        "002007": "华兰生物",
+        "000566": "海南海药",
+        # 科技股
+        "002410": "广联达",
+        "300033": "同花顺",
+        "300368": "涪陵榨菜",  # 修正
+        "002230": "昆仑万维",
+        "300124": "汇川技术",
+        # 消费股
+        "000858": "五粮液",
+        "000568": "泸州老窖",
+        "600809": "山西汾酒",
+        "000596": "古井贡酒",
+        "600132": "重庆啤酒",
+        # 新能源
+        "002129": "中环股份",
+        "600274": "天顺风能",
+        "300014": "亿纬锂能",
+        "002709": "天赐材料",
+        "603799": "华友钴业",
+        # 地产
+        "600048": "保利地产",
+        "600383": "金地集团",
+        "000002": "万  科Ａ",
+        "600606": "绿地控股",
+        "600340": "华夏幸福",
+        # 基建
+        "003013": "地铁设计",
+        "601186": "中国铁建",
+        "601390": "中国中铁",
+    }
+
+    # 股票池在导入时构建一次，各接口直接复用
+    _COMMON_STOCKS_RECORDS = [
+        {"ts_code": _to_ts_code(code), "symbol": code, "name": name, "market": _to_ts_code(code)[:2]}
+        for code, name in _COMMON_CODES.items()
+    ]
+    # market 只有两个取值、name 作过滤键，用 category 存储（int 编码 + 共享字典）
+    _COMMON_STOCKS_DF = pd.DataFrame(_COMMON_STOCKS_RECORDS).astype(
+        {"market": "category", "name": "category"})
+
     def __init__(self, data_source: str = "sina"):
         """
         初始化股票数据接口
@@ -34,7 +230,19 @@ class StockDataAPI:
             data_source: 数据源 ('sina', 'tushare')
         """
         self.data_source = data_source
-        self.cache = {}
+        # 日线数据内存缓存（LRU），并发取数时由锁保护
+        self.cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # 复用连接池（keep-alive），避免每次请求重新握手
+        self.session = requests.Session()
+        self.session.headers.update(SINA_HEADERS)
+        # 连接层自动重试瞬时错误（5xx、连接重置），不必在业务循环里重试
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=Retry(
+            total=3, backoff_factor=0.1, status_forcelist=[500, 502, 503, 504]
+        ))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
         if data_source == "tushare":
             self._init_tushare()
@@ -97,83 +305,7 @@ class StockDataAPI:
 
     def _get_common_stocks(self) -> pd.DataFrame:
         """获取常用股票池（免费接口）- 扩展版"""
-        # 常用指数成分股 + 热门股票
-        common_codes = {
-            # 热门股
-            "600519": "贵州茅台",
-            "000001": "平安银行",
-            "600036": "招商银行",
-            "601398": "工商银行",
-            "601988": "中国银行",
-            "600000": "浦发银行",
-            "300750": "宁德时代",
-            "002594": "比亚迪",
-            "300015": "爱尔眼科",
-            "000651": "格力电器",
-            "600276": "恒瑞医药",
-            "002475": "立讯精密",
-            "601012": "隆基绿能",
-            "600030": "中信证券",
-            "300059": "东方财富",
-            # 银行股
-            "601229": "上海银行",
-            "600919": "江苏银行",
-            "002142": "宁波银行",
-            "600908": "无锡银行",
-            "600928": "西安银行",
-            # 券商股
-            "600837": "海通证券",
-            "600999": "招商证券",
-            "601066": "中信建投",
-            "601788": "光大证券",
-            "600109": "国金证券",
-            # 医药股
-            "600436": "片仔癀",
-            "000513": "丽珠集团",
-            "600055": "万东医疗",
-            "002007": "华兰生物",
-            "000566": "海南海药",
-            # 科技股
-            "002410": "广联达",
-            "300033": "同花顺",
-            "300368": "涪陵榨菜",  # 修正
-            "002230": "昆仑万维",
-            "300124": "汇川技术",
-            # 消费股
-            "000858": "五粮液",
-            "000568": "泸州老窖",
-            "600809": "山西汾酒",
-            "000596": "古井贡酒",
-            "600132": "重庆啤酒",
-            # 新能源
-            "002129": "中环股份",
-            "600274": "天顺风能",
-            "300014": "亿纬锂能",
-            "002709": "天赐材料",
-            "603799": "华友钴业",
-            # 地产
-            "600048": "保利地产",
-            "600383": "金地集团",
-            "000002": "万  科Ａ",
-            "600606": "绿地控股",
-            "600340": "华夏幸福",
-            # 基建
-            "003013": "地铁设计",
-            "601186": "中国铁建",
-            "601390": "中国中铁",
-        }
-
-        data = []
-        for code, name in common_codes.items():
-            prefix = "sh" if code.startswith("6") else "sz"
-            data.append({
-                "ts_code": f"{prefix}{code}",
-                "symbol": code,
-                "name": name,
-                "market": "sh" if prefix == "sh" else "sz",
-            })
-
-        return pd.DataFrame(data)
+        return self._COMMON_STOCKS_DF.copy()
 
     def get_a_stock_list(self) -> List[Dict[str, str]]:
         """
@@ -192,7 +324,7 @@ class StockDataAPI:
                 logger.error(f"Tushare获取A股列表失败: {e}")
         
         # 免费接口：使用扩展的常用股票池
-        return self._get_common_stocks().to_dict('records')
+        return list(self._COMMON_STOCKS_RECORDS)
 
     def get_hot_stocks(self, category: str = "all") -> List[str]:
         """
@@ -219,9 +351,12 @@ class StockDataAPI:
         if keywords is None:
             return stocks['symbol'].tolist()
         
-        # 根据名称过滤
-        filtered = stocks[stocks['name'].apply(lambda x: any(k in x for k in keywords))]
-        return filtered['symbol'].tolist()
+        # 根据名称过滤：正则只扫描去重后的类别，再按类别编码 isin
+        pattern = '|'.join(map(re.escape, keywords))
+        categories = stocks['name'].cat.categories
+        matched = categories[categories.str.contains(pattern, regex=True)]
+        mask = stocks['name'].isin(matched)
+        return stocks.loc[mask, 'symbol'].tolist()
 
     def get_daily_price(self, symbol: str, start_date: str = None,
                         end_date: str = None, adjust: str = "qfq") -> pd.DataFrame:
@@ -235,23 +370,70 @@ class StockDataAPI:
             adjust: 复权类型 ('qfq' 前复权, 'hfq' 后复权, 'none' 不复权)
 
         Returns:
-            日线数据 DataFrame
+            日线数据 DataFrame（新浪接口无历史数据，返回空 DataFrame）
         """
-        if self.data_source == "tushare":
-            return self._get_daily_price_tushare(symbol, start_date, end_date, adjust)
-        else:
+        if self.data_source != "tushare":
+            # 新浪接口是当日实时数据，不做缓存
             return self._get_daily_price_sina(symbol, start_date, end_date)
 
-    def _get_daily_price_tushare(self, symbol: str, start_date: str = None,
-                                  end_date: str = None, adjust: str = "qfq") -> pd.DataFrame:
-        """从Tushare获取日线数据"""
+        default_start, today = _default_dates(date.today().toordinal())
+        if start_date is None:
+            start_date = default_start
+        if end_date is None:
+            end_date = today
+
+        key = (symbol, start_date, end_date, adjust)
+
+        # 1. 内存缓存
+        with self._cache_lock:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache.move_to_end(key)
+        if cached is not None and cached[0] == today:
+            return cached[1].copy()
+
+        # 2. 磁盘缓存
+        path = os.path.join(CACHE_DIR, f"{symbol}_{start_date}_{end_date}_{adjust}.parquet")
+        df = self._read_cached_parquet(path, today)
+
+        # 3. 远程获取
+        if df is None:
+            df = self._get_daily_price_tushare(symbol, start_date, end_date, adjust)
+            if df is None or df.empty:
+                return df
+            self._write_cached_parquet(path, df)
+
+        with self._cache_lock:
+            self.cache[key] = (today, df)
+            self.cache.move_to_end(key)
+            while len(self.cache) > MEMORY_CACHE_SIZE:
+                self.cache.popitem(last=False)
+        return df.copy()
+
+    @staticmethod
+    def _read_cached_parquet(path: str, today: str) -> Optional[pd.DataFrame]:
+        """读取当日写入的磁盘缓存，过期、不存在或缺少 parquet 引擎时返回 None"""
         try:
-            if start_date is None:
-                start_date = (datetime.now() - timedelta(days=365)).strftime("%Y%m%d")
-            if end_date is None:
-                end_date = datetime.now().strftime("%Y%m%d")
+            if datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y%m%d") != today:
+                return None
+            return pd.read_parquet(path)
+        except (OSError, ImportError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_cached_parquet(path: str, df: pd.DataFrame):
+        """写入磁盘缓存，失败（如未安装 pyarrow）时只在内存中缓存"""
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            df.to_parquet(path)
+        except (OSError, ImportError, ValueError) as e:
+            logger.debug(f"写入日线缓存失败: {e}")
 
-            ts_code = f"{'sh' if symbol.startswith('6') else 'sz'}{symbol}"
+    def _get_daily_price_tushare(self, symbol: str, start_date: str,
+                                  end_date: str, adjust: str = "qfq") -> pd.DataFrame:
+        """从Tushare获取日线数据"""
+        try:
+            ts_code = _to_ts_code(symbol)
 
             adj_map = {"qfq": 1, "hfq": 2, "none": 3}
             adj_type = adj_map.get(adjust, 1)
@@ -264,7 +446,12 @@ class StockDataAPI:
             )
 
             if df is not None and not df.empty:
-                df = df.sort_values('trade_date')
+                # Tushare 按日期倒序返回，直接反转即可，无需整表排序
+                if df['trade_date'].is_monotonic_decreasing:
+                    df = df.iloc[::-1].reset_index(drop=True)
+                elif not df['trade_date'].is_monotonic_increasing:
+                    order = np.argsort(df['trade_date'].to_numpy(), kind='stable')
+                    df = df.iloc[order].reset_index(drop=True)
             return df
 
         except Exception as e:
@@ -273,85 +460,226 @@ class StockDataAPI:
 
     def _get_daily_price_sina(self, symbol: str, start_date: str = None,
                               end_date: str = None) -> pd.DataFrame:
-        """从新浪获取日线数据（简化版）"""
+        """
+        从新浪获取日线数据
+
+        新浪 hq 接口只有当日行情，无法提供历史K线，直接返回空 DataFrame
+        （筛选器据此跳过）；当日单条行情请用 get_quote_row。
+        """
+        return pd.DataFrame()
+
+    def get_quote_row(self, symbol: str) -> Optional[Quote]:
+        """
+        获取单只股票当日行情（新浪接口）
+
+        Args:
+            symbol: 股票代码
+
+        Returns:
+            当日 Quote，失败或代码无效时返回 None
+        """
         try:
-            prefix = "sh" if symbol.startswith("6") else "sz"
-            url = f"https://hq.sinajs.cn/list={prefix}{symbol}"
-            headers = {"Referer": "https://finance.sina.com.cn"}
+            url = f"https://hq.sinajs.cn/list={_to_ts_code(symbol)}"
 
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self.session.get(url, timeout=10)
             if response.status_code == 200:
                 data = response.text.split('"')[1].split(',')
+                if len(data) > 9:
+                    return Quote(_today_str(), *_parse_sina_daily(data))
 
-                # 解析数据
-                today_data = {
-                    "trade_date": datetime.now().strftime("%Y%m%d"),
-                    "open": float(data[1]),
-                    "high": float(data[4]),
-                    "low": float(data[5]),
-                    "close": float(data[3]),
-                    "pre_close": float(data[2]),
-                    "vol": float(data[8]) / 100,
-                    "amount": float(data[9]) / 10000,
-                }
-
-                df = pd.DataFrame([today_data])
-                return df
+        except requests.RequestException as e:
+            logger.error(f"获取实时数据失败: {e}")
 
-            return pd.DataFrame()
+        return None
 
-        except Exception as e:
-            logger.error(f"获取实时数据失败: {e}")
-            return pd.DataFrame()
+    def get_daily_price_many(self, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+        """
+        并发获取多只股票日线数据
+
+        Args:
+            symbols: 股票代码列表
+
+        Returns:
+            {股票代码: 日线 DataFrame}
+        """
+        if _has_running_loop():
+            # 已在事件循环中（如 Jupyter）无法 asyncio.run，退回线程池
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                return dict(zip(symbols, executor.map(self.get_daily_price, symbols)))
+        return asyncio.run(self.get_daily_price_many_async(symbols))
+
+    async def get_daily_price_many_async(self, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+        """
+        在事件循环中并发获取多只股票日线数据
+
+        日线来自 Tushare 的同步 SDK，无法直接用 aiohttp 改写，因此交给
+        专用线程池执行（默认线程池在少核机器上只有几个线程），
+        并以信号量限制同时在途的请求数。
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENCY) as executor:
+            async def fetch(symbol: str) -> pd.DataFrame:
+                async with semaphore:
+                    return await loop.run_in_executor(executor, self.get_daily_price, symbol)
+
+            frames = await asyncio.gather(*(fetch(symbol) for symbol in symbols))
+
+        return dict(zip(symbols, frames))
+
+    def get_close_matrix(self, symbols: List[str],
+                         lookback_days: int) -> Tuple[List[str], np.ndarray]:
+        """
+        获取多只股票最近 lookback_days 日收盘价矩阵
+
+        Args:
+            symbols: 股票列表
+            lookback_days: 保留的最近交易日数
+
+        Returns:
+            (有历史数据的股票列表, 形状为 (T, N) 的 float64 收盘价矩阵)
+        """
+        codes, matrices = self.get_price_matrices(symbols, lookback_days, columns=("close",))
+        return codes, matrices["close"]
+
+    def get_price_matrices(self, symbols: List[str], lookback_days: int,
+                           columns: Tuple[str, ...] = ("close",)
+                           ) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """
+        获取多只股票的按列矩阵（每列一只股票，每行一个交易日）
+
+        历史不足 lookback_days 的股票在前部补 NaN；没有历史数据
+        （如新浪接口）的股票不出现在结果中。
+
+        Returns:
+            (股票列表, {列名: 形状为 (T, N) 的连续 float64 矩阵})
+        """
+        frames = self.get_daily_price_many(symbols)
+
+        codes = []
+        histories = []
+        for symbol, df in frames.items():
+            if df is None or df.empty:
+                continue
+            codes.append(symbol)
+            histories.append(df.iloc[-lookback_days:])
+
+        length = max((len(df) for df in histories), default=0)
+        matrices = {}
+        for column in columns:
+            matrix = np.full((length, len(codes)), np.nan)
+            for j, df in enumerate(histories):
+                matrix[length - len(df):, j] = df[column].to_numpy(dtype=np.float64)
+            matrices[column] = np.ascontiguousarray(matrix, dtype=np.float64)
+
+        return codes, matrices
 
     def get_realtime_quote(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
         """
         获取实时行情
 
+        新浪接口一次可查询多只股票，按 QUOTE_BATCH_SIZE 分批请求；
+        安装了 aiohttp 时各批并发请求，否则逐批同步请求
+
+        Args:
+            symbols: 股票代码列表
+
+        Returns:
+            实时行情字典
+        """
+        if aiohttp is None or _has_running_loop():
+            return self._get_realtime_quote_sync(symbols)
+        return asyncio.run(self.get_realtime_quote_async(symbols))
+
+    async def get_realtime_quote_async(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        并发获取实时行情（aiohttp，单线程内同时发起所有批次请求）
+
         Args:
             symbols: 股票代码列表
 
         Returns:
             实时行情字典
         """
+        connector = aiohttp.TCPConnector(limit=64)
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(headers=SINA_HEADERS, connector=connector,
+                                         timeout=timeout) as session:
+            results = await asyncio.gather(*(self._fetch_batch(session, batch)
+                                             for batch in _batches(symbols, QUOTE_BATCH_SIZE)))
+
         quotes = {}
+        for batch_quotes in results:
+            quotes.update(batch_quotes)
+        return quotes
 
-        for symbol in symbols:
-            prefix = "sh" if symbol.startswith("6") else "sz"
-            url = f"https://hq.sinajs.cn/list={prefix}{symbol}"
-            headers = {"Referer": "https://finance.sina.com.cn"}
+    async def _fetch_batch(self, session, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """异步获取一批股票实时行情"""
+        url = _quote_url(symbols)
 
-            try:
-                response = requests.get(url, headers=headers, timeout=10)
-                if response.status_code == 200:
-                    data = response.text.split('"')[1].split(',')
-                    name = data[0]
-
-                    quotes[symbol] = {
-                        "name": name,
-                        "open": float(data[1]),
-                        "pre_close": float(data[2]),
-                        "close": float(data[3]),
-                        "high": float(data[4]),
-                        "low": float(data[5]),
-                        "volume": float(data[8]),
-                        "amount": float(data[9]),
-                        "time": data[30] + " " + data[31] if len(data) > 31 else datetime.now().strftime("%H:%M:%S")
-                    }
-
-                    # 计算涨跌
-                    pre_close = quotes[symbol]["pre_close"]
-                    close = quotes[symbol]["close"]
-                    change = close - pre_close
-                    change_pct = (change / pre_close) * 100 if pre_close > 0 else 0
-
-                    quotes[symbol]["change"] = change
-                    quotes[symbol]["change_pct"] = change_pct
+        try:
+            async with session.get(url) as response:
+                if response.status == 200:
+                    return self._parse_quotes(await response.text())
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"获取 {','.join(symbols)} 实时行情失败: {e}")
 
-            except Exception as e:
-                logger.error(f"获取 {symbol} 实时行情失败: {e}")
+        return {}
+
+    def _get_realtime_quote_sync(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """逐批同步获取实时行情（未安装 aiohttp 时使用）"""
+        quotes = {}
+
+        for batch in _batches(symbols, QUOTE_BATCH_SIZE):
+            try:
+                response = self.session.get(_quote_url(batch), timeout=10)
+            except requests.RequestException as e:
+                # 已由 HTTPAdapter 重试过，仍失败才跳过这一批
+                logger.error(f"获取 {','.join(batch)} 实时行情失败: {e}")
                 continue
 
+            if response.status_code == 200:
+                quotes.update(self._parse_quotes(response.text))
+
+        return quotes
+
+    def _parse_quotes(self, text: str) -> Dict[str, Dict[str, Any]]:
+        """
+        解析多行新浪行情响应，按股票代码（去掉市场前缀）索引
+
+        一次正则扫描取出每行的代码、名称、数值字段（下标 1-9）与日期时间，
+        数值字段拼接后一次 np.fromstring 解析；无效代码返回空串，不会匹配。
+        停牌等股票的数值字段可能为 "--"，解析前先逐行校验，跳过含非数字字段的行。
+        """
+        matches = []
+        for m in _SINA_RE.finditer(text):
+            if _SINA_NUMS_RE.fullmatch(m['nums']):
+                matches.append(m)
+            else:
+                logger.warning(f"行情数据无法解析，已跳过: {m['code']}")
+        if not matches:
+            return {}
+
+        numeric = np.fromstring(",".join(m['nums'] for m in matches),
+                                sep=",", dtype=np.float64).reshape(len(matches), 9)
+        now = datetime.now().strftime("%H:%M:%S")
+
+        quotes = {}
+        for m, values in zip(matches, numeric.tolist()):
+            quote = {"name": m['name']}
+            for field in _QUOTE_NUMERIC_FIELDS:
+                quote[field] = values[SINA_FIELDS[field][0] - 1]
+            quote["time"] = m['date'] + " " + m['time'] if m['time'] is not None else now
+
+            # 计算涨跌
+            pre_close = quote["pre_close"]
+            change = quote["close"] - pre_close
+            quote["change"] = change
+            quote["change_pct"] = (change / pre_close) * 100 if pre_close > 0 else 0
+
+            quotes[m['code'][2:]] = quote
+
         return quotes
 
 
@@ -374,40 +702,39 @@ class StockScreener:
         Returns:
             符合条件的股票列表
         """
-        results = []
-
-        for symbol in symbols:
-            try:
-                df = self.api.get_daily_price(symbol, start_date=None)
-                if df is None or df.empty or len(df) < compare_ma:
-                    continue
-
-                # 计算均线
-                df['ma_short'] = df['close'].rolling(window=ma_days).mean()
-                df['ma_long'] = df['close'].rolling(window=compare_ma).mean()
-
-                latest = df.iloc[-1]
-
-                # 筛选条件：股价在均线上方 + 均线金叉
-                if latest['close'] > latest['ma_short'] > latest['ma_long']:
-                    prev_short = df.iloc[-2]['ma_short']
-                    prev_long = df.iloc[-2]['ma_long']
-
-                    # 金叉检测
-                    if prev_short <= prev_long and latest['ma_short'] > latest['ma_long']:
-                        results.append({
-                            "symbol": symbol,
-                            "close": latest['close'],
-                            "ma_short": latest['ma_short'],
-                            "ma_long": latest['ma_long'],
-                            "change_pct": ((latest['close'] - df.iloc[-2]['close']) / df.iloc[-2]['close']) * 100 if len(df) > 1 else 0
-                        })
-
-            except Exception as e:
-                logger.error(f"筛选 {symbol} 时出错: {e}")
-                continue
-
-        return sorted(results, key=lambda x: x['change_pct'], reverse=True)
+        # 只需要最后两根均线，按较长的均线多取一根即可判断金叉
+        lookback = max(ma_days, compare_ma) + 1
+        codes, closes = self.api.get_close_matrix(symbols, lookback)
+        if len(codes) == 0 or len(closes) < 2:
+            return []
+
+        # 只需最新与前一日的均线：按列对尾部切片求均值。
+        # 矩阵行数可能少于 lookback（所有股票历史都短），尾部切片不会补 NaN，
+        # 因此另按每列有效K线数排除历史不足 lookback 日的股票
+        enough = np.count_nonzero(~np.isnan(closes), axis=0) >= lookback
+        short = closes[-ma_days:].mean(axis=0)
+        long_ = closes[-compare_ma:].mean(axis=0)
+        prev_short = closes[-ma_days - 1:-1].mean(axis=0)
+        prev_long = closes[-compare_ma - 1:-1].mean(axis=0)
+
+        close, prev_close = closes[-1], closes[-2]
+
+        # 筛选条件：股价在均线上方 + 均线金叉
+        with np.errstate(invalid='ignore'):
+            mask = enough & (close > short) & (short > long_) & (prev_short <= prev_long)
+            change_pct = (close - prev_close) / prev_close * 100
+
+        results = [
+            {
+                "symbol": codes[i],
+                "close": close[i],
+                "ma_short": short[i],
+                "ma_long": long_[i],
+                "change_pct": change_pct[i],
+            }
+            for i in np.flatnonzero(mask)
+        ]
+        return sorted(results, key=itemgetter('change_pct'), reverse=True)
 
     def screen_by_volume(self, symbols: List[str], volume_multiplier: float = 2.0) -> List[Dict[str, Any]]:
         """
@@ -420,33 +747,35 @@ class StockScreener:
         Returns:
             符合条件的股票列表
         """
-        results = []
-
-        for symbol in symbols:
-            try:
-                df = self.api.get_daily_price(symbol, start_date=None)
-                if df is None or df.empty or len(df) < 5:
-                    continue
-
-                latest = df.iloc[-1]
-                avg_volume = df['vol'].iloc[-5:].mean()
-
-                # 成交量放大
-                if latest['vol'] > avg_volume * volume_multiplier:
-                    results.append({
-                        "symbol": symbol,
-                        "close": latest['close'],
-                        "volume": latest['vol'],
-                        "avg_volume": avg_volume,
-                        "volume_ratio": latest['vol'] / avg_volume,
-                        "change_pct": ((latest['close'] - df.iloc[-2]['close']) / df.iloc[-2]['close']) * 100 if len(df) > 1 else 0
-                    })
-
-            except Exception as e:
-                logger.error(f"筛选 {symbol} 时出错: {e}")
-                continue
-
-        return sorted(results, key=lambda x: x['volume_ratio'], reverse=True)
+        codes, matrices = self.api.get_price_matrices(symbols, 5, columns=("close", "vol"))
+        closes, vols = matrices["close"], matrices["vol"]
+        if len(codes) == 0 or len(closes) < 2:
+            return []
+
+        # 矩阵行数可能少于 5（所有股票历史都短），按每列有效天数排除历史不足 5 日的股票
+        enough = np.count_nonzero(~np.isnan(vols), axis=0) >= 5
+        avg_volume = vols.mean(axis=0)
+        volume = vols[-1]
+        close, prev_close = closes[-1], closes[-2]
+
+        # 成交量放大
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mask = enough & (volume > avg_volume * volume_multiplier)
+            volume_ratio = volume / avg_volume
+            change_pct = (close - prev_close) / prev_close * 100
+
+        results = [
+            {
+                "symbol": codes[i],
+                "close": close[i],
+                "volume": volume[i],
+                "avg_volume": avg_volume[i],
+                "volume_ratio": volume_ratio[i],
+                "change_pct": change_pct[i],
+            }
+            for i in np.flatnonzero(mask)
+        ]
+        return sorted(results, key=itemgetter('volume_ratio'), reverse=True)
 
 
 if __name__ == "__main__":
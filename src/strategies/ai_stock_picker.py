@@ -3,34 +3,303 @@
 """
 AI选股策略模块
 基于多因子模型的智能选股系统
+
+在项目根目录以模块方式运行演示（模块使用包内相对导入，不能直接运行文件）：
+    python -m src.strategies.ai_stock_picker
 """
 
-import os
-import sys
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-import pandas as pd
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 
-# 添加项目根目录到路径
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from data.stock_api import StockDataAPI, StockScreener
-from utils.logger import setup_logger
-from utils.technical_analysis import TechnicalAnalyzer
+from ..data.stock_api import StockDataAPI, StockScreener
+from ..utils.logger import setup_logger
+from ..utils.technical_analysis import TechnicalAnalyzer
+from ..utils._njit import njit, prange, NUMBA_AVAILABLE
 
 logger = setup_logger(__name__)
 
 
+@njit(cache=True)
+def _trend_score(current, ma5, ma20, ma60):
+    """趋势得分：价格位于各均线上方及均线多头排列加分"""
+    score = 50.0
+    if current > ma5:
+        score += 10
+    if current > ma20:
+        score += 15
+    if current > ma60:
+        score += 15
+    if ma5 > ma20 and ma20 > ma60:
+        score += 10
+    return min(score, 100.0)
+
+
+@njit(cache=True)
+def _volume_score(vol_ratio):
+    """量能得分：量能适中或偏大为好"""
+    if 0.8 <= vol_ratio <= 2.0:
+        score = 70 + (vol_ratio - 1) * 20
+    elif vol_ratio < 0.8:
+        score = 50 + vol_ratio * 25
+    else:
+        score = min(90 - (vol_ratio - 2) * 10, 90.0)
+    return max(min(score, 100.0), 0.0)
+
+
+@njit(cache=True)
+def _volatility_score(volatility):
+    """波动得分：适度波动较好"""
+    if 2.0 <= volatility <= 4.0:
+        return 80.0
+    elif volatility < 2.0:
+        return 60 + volatility * 10
+    return max(80 - (volatility - 4) * 10, 40.0)
+
+
+@dataclass
+class FactorMetrics:
+    """单只股票的均线、因子得分与行情指标"""
+    ma5: float
+    ma20: float
+    ma60: float
+    momentum_score: float
+    trend_score: float
+    volume_score: float
+    volatility_score: float
+    volume_ratio: float
+    change_pct: float
+
+
+# 不含 nnan/ninf 的 fastmath 标志：除零得到的 inf/NaN 须如实传播，与 NumPy 实现一致
+_FASTMATH_FINITE = {'nsz', 'arcp', 'contract', 'afn', 'reassoc'}
+
+
+# 显式签名使导入时即编译，cache=True 把结果落盘到 __pycache__，后续进程直接加载；
+# error_model='numpy' 使除零得到 inf/NaN 而不是抛 ZeroDivisionError
+@njit('UniTuple(f8, 9)(f8[::1], f8[::1])', cache=True, fastmath=_FASTMATH_FINITE,
+      error_model='numpy')
+def _all_metrics_kernel(close, vol):
+    """
+    从最新一根K线向前单次遍历，同时累加 5/20/60 日窗口、5日动量与日收益率方差
+
+    返回值顺序与 FactorMetrics 字段一致，close/vol 须为连续 float64 数组。
+    成交量或前收盘价为 0 时相应指标为 inf/NaN（与 _all_metrics_numpy 相同）。
+    """
+    n = close.shape[0]
+
+    c5 = c20 = c60 = 0.0
+    v5 = v20 = 0.0
+    mom5 = 0.0
+    ret_mean = ret_m2 = 0.0
+    for k in range(1, n + 1):  # k 为距末尾的位置（1 为最新）
+        i = n - k
+        c = close[i]
+        if k <= 5:
+            c5 += c
+            v5 += vol[i]
+            if i >= 5:
+                mom5 += c / close[i - 5] - 1
+        if k <= 20:
+            c20 += c
+            v20 += vol[i]
+        if k <= 60:
+            c60 += c
+        if i >= 1:
+            # Welford 在线方差
+            r = c / close[i - 1] - 1
+            delta = r - ret_mean
+            ret_mean += delta / k
+            ret_m2 += delta * (r - ret_mean)
+
+    current = close[n - 1]
+    ma5 = c5 / 5 if n >= 5 else current
+    ma20 = c20 / 20 if n >= 20 else current
+    ma60 = c60 / 60 if n >= 60 else ma20
+
+    momentum = min(max(mom5 / 5 * 100 * 10 + 50, 0.0), 100.0) if n >= 10 else 50.0
+    trend = _trend_score(current, ma5, ma20, ma60) if n >= 20 else 50.0
+
+    volume = 50.0
+    if n >= 10:
+        avg_vol = v20 / min(n, 20)
+        volume = _volume_score((v5 / 5) / avg_vol if avg_vol > 0 else 1.0)
+
+    volatility = _volatility_score(np.sqrt(ret_m2 / (n - 2)) * 100) if n >= 20 else 50.0
+
+    volume_ratio = vol[n - 1] / (v20 / 20) if n >= 20 else 1.0
+    change_pct = (current - close[n - 2]) / close[n - 2] * 100 if n > 1 else 0.0
+
+    return ma5, ma20, ma60, momentum, trend, volume, volatility, volume_ratio, change_pct
+
+
+def _all_metrics_numpy(close: np.ndarray, vol: np.ndarray) -> FactorMetrics:
+    """compute_all_metrics 的 NumPy 实现（未安装 numba 时使用）"""
+    n = len(close)
+    current = close[-1]
+    ma5 = close[-5:].mean() if n >= 5 else current
+    ma20 = close[-20:].mean() if n >= 20 else current
+    ma60 = close[-60:].mean() if n >= 60 else ma20
+
+    momentum = 50.0
+    if n >= 10:
+        # 最近5日的5日收益率均值（等价于 pct_change(periods=5) 取尾部5个）
+        recent_return = (close[-5:] / close[-10:-5] - 1).mean() * 100
+        momentum = min(max(recent_return * 10 + 50, 0.0), 100.0)
+
+    trend = _trend_score(current, ma5, ma20, ma60) if n >= 20 else 50.0
+
+    volume = 50.0
+    if n >= 10:
+        avg_vol = vol[-20:].mean()
+        volume = _volume_score(vol[-5:].mean() / avg_vol if avg_vol > 0 else 1.0)
+
+    volatility = 50.0
+    if n >= 20:
+        returns = close[1:] / close[:-1] - 1.0
+        volatility = _volatility_score(returns.std(ddof=1) * 100)  # 与 pandas 的样本标准差一致
+
+    return FactorMetrics(
+        ma5=ma5,
+        ma20=ma20,
+        ma60=ma60,
+        momentum_score=momentum,
+        trend_score=trend,
+        volume_score=volume,
+        volatility_score=volatility,
+        volume_ratio=vol[-1] / vol[-20:].mean() if n >= 20 else 1.0,
+        change_pct=(current - close[-2]) / close[-2] * 100 if n > 1 else 0.0,
+    )
+
+
+def compute_all_metrics(close: np.ndarray, vol: np.ndarray) -> FactorMetrics:
+    """
+    一次性计算均线、四项因子得分 (0-100)、量比与涨跌幅
+
+    Args:
+        close: 收盘价数组（连续 float64）
+        vol: 成交量数组（连续 float64）
+
+    Returns:
+        FactorMetrics
+    """
+    if NUMBA_AVAILABLE:
+        return FactorMetrics(*_all_metrics_kernel(close, vol))
+    return _all_metrics_numpy(close, vol)
+
+
+@njit('f8[:, ::1](f8[:, ::1], f8[:, ::1], i8[::1])', cache=True, parallel=True,
+      error_model='numpy')
+def _batch_metrics_kernel(closes, vols, lengths):
+    """
+    逐行（并行）调用单股内核，每行只取右对齐的有效部分
+
+    某行除零时该行指标为 inf/NaN（与 _batch_metrics_numpy 相同），不影响其他行。
+    """
+    n_sym, t = closes.shape
+    out = np.full((n_sym, 9), np.nan)
+    for i in prange(n_sym):
+        start = t - lengths[i]
+        metrics = _all_metrics_kernel(closes[i, start:], vols[i, start:])
+        for j in range(9):
+            out[i, j] = metrics[j]
+    return out
+
+
+def _batch_metrics_numpy(closes: np.ndarray, vols: np.ndarray, lengths: np.ndarray) -> FactorMetrics:
+    """compute_all_metrics_batch 的 NumPy 实现，全部按 axis=1 归约"""
+    current = closes[:, -1]
+    ma5 = closes[:, -5:].mean(axis=1)
+    ma20 = closes[:, -20:].mean(axis=1)
+    ma60 = np.where(lengths >= 60, closes[:, -60:].mean(axis=1), ma20)
+
+    # 1. 动量：最近5日的5日收益率均值
+    recent_return = (closes[:, -5:] / closes[:, -10:-5] - 1).mean(axis=1) * 100
+    momentum = np.clip(recent_return * 10 + 50, 0.0, 100.0)
+
+    # 2. 趋势
+    trend = (50.0 + 10 * (current > ma5) + 15 * (current > ma20) + 15 * (current > ma60)
+             + 10 * ((ma5 > ma20) & (ma20 > ma60)))
+    trend = np.minimum(trend, 100.0)
+
+    # 3. 量能
+    avg_vol = vols[:, -20:].mean(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(avg_vol > 0, vols[:, -5:].mean(axis=1) / avg_vol, 1.0)
+    volume = np.select(
+        [(ratio >= 0.8) & (ratio <= 2.0), ratio < 0.8],
+        [70 + (ratio - 1) * 20, 50 + ratio * 25],
+        np.minimum(90 - (ratio - 2) * 10, 90.0),
+    )
+    volume = np.clip(volume, 0.0, 100.0)
+
+    # 4. 波动：左侧补齐的 NaN 收益率由 nanstd 跳过
+    returns = closes[:, 1:] / closes[:, :-1] - 1.0
+    vola = np.nanstd(returns, axis=1, ddof=1) * 100
+    volatility = np.select(
+        [(vola >= 2.0) & (vola <= 4.0), vola < 2.0],
+        [80.0, 60 + vola * 10],
+        np.maximum(80 - (vola - 4) * 10, 40.0),
+    )
+
+    return FactorMetrics(
+        ma5=ma5,
+        ma20=ma20,
+        ma60=ma60,
+        momentum_score=momentum,
+        trend_score=trend,
+        volume_score=volume,
+        volatility_score=volatility,
+        volume_ratio=vols[:, -1] / avg_vol,
+        change_pct=(current - closes[:, -2]) / closes[:, -2] * 100,
+    )
+
+
+def compute_all_metrics_batch(closes: np.ndarray, vols: np.ndarray,
+                              lengths: np.ndarray) -> FactorMetrics:
+    """
+    批量计算多只股票的指标（SoA 布局）
+
+    Args:
+        closes: 收盘价矩阵 (N, T)，每行右对齐、左侧补 NaN
+        vols: 成交量矩阵 (N, T)，布局同 closes
+        lengths: 每行有效数据长度 (N,)，均须不少于 20
+
+    Returns:
+        FactorMetrics，各字段为长度 N 的数组
+    """
+    if NUMBA_AVAILABLE:
+        return FactorMetrics(*_batch_metrics_kernel(closes, vols, lengths).T)
+    return _batch_metrics_numpy(closes, vols, lengths)
+
+
+def _combine_scores(m: FactorMetrics, method: str):
+    """按评分方法合成综合得分（标量或数组均可）"""
+    if method == "comprehensive":
+        return (m.momentum_score * 0.3 + m.trend_score * 0.3 +
+                m.volume_score * 0.2 + m.volatility_score * 0.2)
+    elif method == "momentum":
+        return m.momentum_score
+    elif method == "trend":
+        return m.trend_score
+    return (m.momentum_score + m.trend_score) / 2
+
+
+if NUMBA_AVAILABLE:
+    # 预热：首次选股时不再有分派/加载延迟
+    _all_metrics_kernel(np.ones(2), np.ones(2))
+
+
 class AIStockPicker:
     """AI智能选股器"""
 
-    def __init__(self, data_api: StockDataAPI = None):
+    def __init__(self, data_api: Optional[StockDataAPI] = None):
         """
         初始化AI选股器
 
         Args:
-            data_api: 股票数据API实例
+            data_api: 股票数据API实例（传入共享实例可复用其缓存和连接）
         """
         self.api = data_api or StockDataAPI()
         self.screener = StockScreener(self.api)
@@ -47,163 +316,98 @@ class AIStockPicker:
         Returns:
             评分后的股票列表
         """
-        results = []
-
-        for symbol in symbols:
-            try:
-                # 获取历史数据
-                df = self.api.get_daily_price(symbol, start_date=None)
-                if df is None or df.empty or len(df) < 30:
-                    continue
-
-                # 计算各项因子得分
-                score = 0.0
-                factors = {}
-
-                # 1. 动量因子
-                momentum_score = self._calc_momentum_score(df)
-                factors['momentum'] = momentum_score
-
-                # 2. 趋势因子
-                trend_score = self._calc_trend_score(df)
-                factors['trend'] = trend_score
-
-                # 3. 量能因子
-                volume_score = self._calc_volume_score(df)
-                factors['volume'] = volume_score
-
-                # 4. 波动因子
-                volatility_score = self._calc_volatility_score(df)
-                factors['volatility'] = volatility_score
-
-                # 综合评分
-                if method == "comprehensive":
-                    score = (momentum_score * 0.3 + trend_score * 0.3 +
-                            volume_score * 0.2 + volatility_score * 0.2)
-                elif method == "momentum":
-                    score = momentum_score
-                elif method == "trend":
-                    score = trend_score
-                else:
-                    score = (momentum_score + trend_score) / 2
-
-                latest = df.iloc[-1]
-                quote = self.api.get_realtime_quote([symbol])
-                current_price = latest['close']
-                change_pct = ((current_price - df.iloc[-2]['close']) / df.iloc[-2]['close']) * 100 if len(df) > 1 else 0
-
-                results.append({
-                    "symbol": symbol,
-                    "score": score,
-                    "factors": factors,
-                    "price": current_price,
-                    "change_pct": change_pct,
-                    "ma5": latest['close'] if len(df) < 5 else df['close'].iloc[-5:].mean(),
-                    "ma20": df['close'].iloc[-20:].mean() if len(df) >= 20 else current_price,
-                    "volume_ratio": latest['vol'] / df['vol'].iloc[-20:].mean() if len(df) >= 20 else 1.0,
-                })
-
-            except Exception as e:
-                logger.error(f"分析 {symbol} 时出错: {e}")
-                continue
+        frames = self.api.get_daily_price_many(symbols)
+        valid = [(symbol, df) for symbol, df in frames.items()
+                 if df is not None and not df.empty and len(df) >= 30]
+        if not valid:
+            return []
+
+        # 所有候选股拼成 (N, T) 矩阵，右对齐、左侧补 NaN，一次算出全部指标
+        t = max(len(df) for _, df in valid)
+        closes = np.full((len(valid), t), np.nan)
+        vols = np.full((len(valid), t), np.nan)
+        lengths = np.empty(len(valid), dtype=np.int64)
+        for i, (_, df) in enumerate(valid):
+            n = len(df)
+            closes[i, t - n:] = df['close'].to_numpy(dtype=np.float64)
+            vols[i, t - n:] = df['vol'].to_numpy(dtype=np.float64)
+            lengths[i] = n
+
+        m = compute_all_metrics_batch(closes, vols, lengths)
+        scores = _combine_scores(m, method)
+
+        # 成交量或收盘价为 0 等异常数据得分为 inf/NaN，跳过这些股票
+        finite = np.isfinite(scores)
+        for i in np.flatnonzero(~finite):
+            logger.warning(f"{valid[i][0]} 数据异常，无法计算得分，已跳过")
+
+        results = [
+            {
+                "symbol": symbol,
+                "score": float(scores[i]),
+                "factors": {
+                    'momentum': float(m.momentum_score[i]),
+                    'trend': float(m.trend_score[i]),
+                    'volume': float(m.volume_score[i]),
+                    'volatility': float(m.volatility_score[i]),
+                },
+                "price": float(closes[i, -1]),
+                "change_pct": float(m.change_pct[i]),
+                "ma5": float(m.ma5[i]),
+                "ma20": float(m.ma20[i]),
+                "volume_ratio": float(m.volume_ratio[i]),
+            }
+            for i, (symbol, _) in enumerate(valid)
+            if finite[i]
+        ]
 
         # 按分数排序
         results = sorted(results, key=lambda x: x['score'], reverse=True)
 
         return results
 
-    def _calc_momentum_score(self, df: pd.DataFrame) -> float:
-        """计算动量得分 (0-100)"""
-        try:
-            if len(df) < 10:
-                return 50.0
-
-            returns = df['close'].pct_change(periods=5).dropna()
-
-            # 最近5日收益
-            recent_return = returns.iloc[-5:].mean() * 100 if len(returns) >= 5 else 0
-
-            # 动量强度
-            momentum = min(max(recent_return * 10 + 50, 0), 100)
-
-            return momentum
-        except:
-            return 50.0
+    def _load_arrays(self, symbol: str, min_len: int = 30) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        获取历史数据并取出收盘价、成交量数组
 
-    def _calc_trend_score(self, df: pd.DataFrame) -> float:
-        """计算趋势得分 (0-100)"""
-        try:
-            if len(df) < 20:
-                return 50.0
-
-            current = df['close'].iloc[-1]
-            ma5 = df['close'].iloc[-5:].mean()
-            ma20 = df['close'].iloc[-20:].mean()
-            ma60 = df['close'].iloc[-60:].mean() if len(df) >= 60 else ma20
-
-            # 价格在均线上方
-            price_above_ma5 = current > ma5
-            price_above_ma20 = current > ma20
-            price_above_ma60 = current > ma60
-
-            # 均线多头排列
-            ma_bullish = ma5 > ma20 > ma60
-
-            score = 50.0
-            if price_above_ma5:
-                score += 10
-            if price_above_ma20:
-                score += 15
-            if price_above_ma60:
-                score += 15
-            if ma_bullish:
-                score += 10
-
-            return min(score, 100)
-        except:
-            return 50.0
-
-    def _calc_volume_score(self, df: pd.DataFrame) -> float:
-        """计算量能得分 (0-100)"""
+        只有远程取数放在 try 中；数据不足直接返回 None，不走异常流程。
+        """
         try:
-            if len(df) < 10:
-                return 50.0
-
-            recent_vol = df['vol'].iloc[-5:].mean()
-            avg_vol = df['vol'].iloc[-20:].mean()
+            df = self.api.get_daily_price(symbol, start_date=None)
+        except Exception as e:
+            logger.error(f"获取 {symbol} 历史数据失败: {e}")
+            return None
 
-            vol_ratio = recent_vol / avg_vol if avg_vol > 0 else 1.0
+        if df is None or df.empty or len(df) < min_len:
+            return None
 
-            # 量能适中或偏大为好
-            if 0.8 <= vol_ratio <= 2.0:
-                score = 70 + (vol_ratio - 1) * 20
-            elif vol_ratio < 0.8:
-                score = 50 + vol_ratio * 25
-            else:
-                score = min(90 - (vol_ratio - 2) * 10, 90)
+        # 只取一次底层数组，后续因子计算都在 ndarray 上完成；
+        # 复制一份：pandas 写时复制下 to_numpy 给出只读视图，与内核签名不符
+        close = np.array(df['close'], dtype=np.float64)
+        vol = np.array(df['vol'], dtype=np.float64)
+        return close, vol
 
-            return max(min(score, 100), 0)
-        except:
-            return 50.0
+    def _score_arrays(self, symbol: str, close: np.ndarray, vol: np.ndarray,
+                      method: str) -> Dict[str, Any]:
+        """根据收盘价、成交量数组计算因子评分"""
+        # 单次遍历算出全部指标
+        m = compute_all_metrics(close, vol)
 
-    def _calc_volatility_score(self, df: pd.DataFrame) -> float:
-        """计算波动得分 (0-100)"""
-        try:
-            if len(df) < 20:
-                return 50.0
-
-            returns = df['close'].pct_change().dropna()
-            volatility = returns.std() * 100
-
-            # 适度波动较好
-            if 2.0 <= volatility <= 4.0:
-                return 80
-            elif volatility < 2.0:
-                return 60 + volatility * 10
-            else:
-                return max(80 - (volatility - 4) * 10, 40)
-        except:
-            return 50.0
+        return {
+            "symbol": symbol,
+            "score": _combine_scores(m, method),
+            "factors": {
+                'momentum': m.momentum_score,
+                'trend': m.trend_score,
+                'volume': m.volume_score,
+                'volatility': m.volatility_score,
+            },
+            "price": close[-1],
+            "change_pct": m.change_pct,
+            "ma5": m.ma5,
+            "ma20": m.ma20,
+            "volume_ratio": m.volume_ratio,
+        }
 
     def generate_trading_signal(self, symbol: str) -> Dict[str, Any]:
         """
@@ -215,67 +419,63 @@ class AIStockPicker:
         Returns:
             交易信号字典
         """
-        try:
-            df = self.api.get_daily_price(symbol, start_date=None)
-            if df is None or df.empty or len(df) < 30:
-                return {"signal": "hold", "reason": "数据不足"}
-
-            # 计算综合得分
-            scores = self.pick_by_ai_score([symbol], method="comprehensive")
-            if not scores:
-                return {"signal": "hold", "reason": "无法分析"}
-
-            stock = scores[0]
-            score = stock['score']
-
-            # 生成信号
-            if score >= 80:
-                signal = "strong_buy"
-                reason = "AI综合得分极高，多项指标向好"
-            elif score >= 65:
-                signal = "buy"
-                reason = "AI综合得分较高，可以关注"
-            elif score >= 50:
-                signal = "hold"
-                reason = "AI综合得分一般，建议观望"
-            elif score >= 35:
-                signal = "sell"
-                reason = "AI综合得分偏低，谨慎持有"
-            else:
-                signal = "strong_sell"
-                reason = "AI综合得分很低，建议卖出"
-
-            return {
-                "signal": signal,
-                "score": score,
-                "price": stock['price'],
-                "factors": stock['factors'],
-                "reason": reason,
-                "ma5": stock['ma5'],
-                "ma20": stock['ma20'],
-                "volume_ratio": stock['volume_ratio'],
-            }
+        arrays = self._load_arrays(symbol)
+        if arrays is None:
+            return {"signal": "hold", "reason": "数据不足"}
+
+        # 计算综合得分（复用已取到的数据，不再重复请求）
+        stock = self._score_arrays(symbol, *arrays, "comprehensive")
+        score = stock['score']
+        if not np.isfinite(score):
+            # 成交量或收盘价为 0 等异常数据，得分无意义
+            return {"signal": "hold", "reason": "数据异常，无法计算得分"}
+
+        # 生成信号
+        if score >= 80:
+            signal = "strong_buy"
+            reason = "AI综合得分极高，多项指标向好"
+        elif score >= 65:
+            signal = "buy"
+            reason = "AI综合得分较高，可以关注"
+        elif score >= 50:
+            signal = "hold"
+            reason = "AI综合得分一般，建议观望"
+        elif score >= 35:
+            signal = "sell"
+            reason = "AI综合得分偏低，谨慎持有"
+        else:
+            signal = "strong_sell"
+            reason = "AI综合得分很低，建议卖出"
 
-        except Exception as e:
-            logger.error(f"生成交易信号失败: {e}")
-            return {"signal": "hold", "reason": f"分析出错: {str(e)}"}
+        return {
+            "signal": signal,
+            "score": score,
+            "price": stock['price'],
+            "factors": stock['factors'],
+            "reason": reason,
+            "ma5": stock['ma5'],
+            "ma20": stock['ma20'],
+            "volume_ratio": stock['volume_ratio'],
+        }
 
 
 class StrategyPortfolio:
     """策略组合管理"""
 
-    def __init__(self, initial_capital: float = 10000):
+    def __init__(self, initial_capital: float = 10000,
+                 data_api: Optional[StockDataAPI] = None):
         """
         初始化组合
 
         Args:
             initial_capital: 初始资金
+            data_api: 股票数据API实例
         """
         self.initial_capital = initial_capital
         self.current_capital = initial_capital
         self.positions = {}  # 持仓
         self.trade_history = []  # 交易记录
-        self.picker = AIStockPicker()
+        self.picker = AIStockPicker(data_api)
 
     def add_position(self, symbol: str, weight: float = 0.2):
         """
@@ -322,19 +522,20 @@ class StrategyPortfolio:
 
         return signal
 
-    def remove_position(self, symbol: str):
+    def remove_position(self, symbol: str, quotes: Optional[Dict[str, Dict[str, Any]]] = None):
         """
         清仓持仓
 
         Args:
             symbol: 股票代码
+            quotes: 预先批量获取的行情（可选，未提供时单独请求）
         """
         if symbol not in self.positions:
             logger.info(f"{symbol} 不在持仓中")
             return
 
         position = self.positions[symbol]
-        quote = self.picker.api.get_realtime_quote([symbol])
+        quote = quotes if quotes is not None else self.picker.api.get_realtime_quote([symbol])
 
         if symbol in quote:
             current_price = quote[symbol]['close']
@@ -356,10 +557,12 @@ class StrategyPortfolio:
         total_value = 0
         positions_info = []
 
+        # 所有持仓一次批量获取行情
+        quotes = self.picker.api.get_realtime_quote(list(self.positions.keys())) if self.positions else {}
+
         for symbol, position in self.positions.items():
-            quote = self.picker.api.get_realtime_quote([symbol])
-            if symbol in quote:
-                current_price = quote[symbol]['close']
+            if symbol in quotes:
+                current_price = quotes[symbol]['close']
                 market_value = current_price * position['shares']
                 profit_pct = (current_price - position['price']) / position['price'] * 100
 
@@ -390,10 +593,12 @@ class StrategyPortfolio:
         Args:
             target_weights: 目标权重字典
         """
-        # 卖出不在目标中的持仓
-        for symbol in list(self.positions.keys()):
-            if symbol not in target_weights:
-                self.remove_position(symbol)
+        # 卖出不在目标中的持仓（行情一次批量获取）
+        to_sell = [symbol for symbol in self.positions if symbol not in target_weights]
+        if to_sell:
+            quotes = self.picker.api.get_realtime_quote(to_sell)
+            for symbol in to_sell:
+                self.remove_position(symbol, quotes)
 
         # 调整现有持仓权重
         for symbol, target_weight in target_weights.items():
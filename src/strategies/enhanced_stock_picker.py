@@ -3,18 +3,26 @@
 """
 AI选股增强模块
 针对每只股票进行深度个性化分析
+
+在项目根目录以模块方式运行演示（模块使用包内相对导入，不能直接运行文件）：
+    python -m src.strategies.enhanced_stock_picker
 """
 
-import os
-import sys
-from datetime import datetime, timedelta
-from typing import Dict, List, Any
-from dataclasses import dataclass
+import heapq
+import time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, replace
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
 
-from data.stock_api import StockDataAPI
-from utils.logger import setup_logger
+from ..data.stock_api import StockDataAPI
+from ..utils.logger import setup_logger
+from ..utils._njit import njit, prange, NUMBA_AVAILABLE
+from ..utils._compat import DATACLASS_SLOTS
 
 logger = setup_logger(__name__)
 
@@ -41,7 +49,98 @@ MARKET_CONTEXT = """
 """
 
 
-@dataclass
+@njit("f8(f8, f8, f8, f8, f8)", cache=True)
+def _technical_score_nb(price, change_pct, volume, high, low):
+    """技术得分 (0-100)：动量、振幅、量能、日内位置"""
+    score = 50
+
+    # 动量
+    if change_pct > 5:
+        score += 25
+    elif change_pct > 3:
+        score += 20
+    elif change_pct > 1:
+        score += 15
+    elif change_pct > 0:
+        score += 10
+    else:
+        score += 5
+
+    # 振幅
+    daily_range = (high - low) / low * 100 if low > 0 else 0
+    if daily_range > 5:
+        score += 10
+    elif daily_range > 3:
+        score += 7
+    else:
+        score += 5
+
+    # 量能
+    if volume > 20000000:
+        score += 10
+    elif volume > 10000000:
+        score += 7
+    else:
+        score += 3
+
+    # 价格位置
+    if high > 0 and low > 0:
+        price_position = (price - low) / (high - low) * 100 if high != low else 50
+        if price_position > 80:
+            score += 5
+        elif price_position < 20:
+            score -= 5
+
+    return min(score, 100)
+
+
+@njit("f8(f8, f8, f8)", cache=True)
+def _fund_score_nb(price, change_pct, policy_score):
+    """基本面得分 (0-100)：价格区间、涨跌幅、行业地位"""
+    score = 60
+
+    # 估值合理性
+    if 10 <= price <= 100:
+        score += 15
+    elif price > 500:
+        score -= 10
+    elif price < 5:
+        score -= 5
+
+    # 涨跌幅合理性
+    if change_pct > 7:
+        score -= 10
+    elif change_pct > 3:
+        score -= 5
+    elif -3 < change_pct <= 0:
+        score += 10
+
+    # 行业地位
+    if policy_score >= 85:
+        score += 10
+    elif policy_score >= 75:
+        score += 5
+
+    return min(max(score, 0), 100)
+
+
+@njit(cache=True, parallel=True)
+def score_batch(price, change_pct, volume, high, low, policy_score,
+                out_tech, out_fund, out_final):
+    """
+    多线程批量打分：逐只计算技术分、基本面分与综合分，写入输出数组
+
+    输入均为等长的连续 float64 数组；综合分 = 0.4 技术 + 0.35 政策 + 0.25 基本面。
+    """
+    for i in prange(price.shape[0]):
+        tech = _technical_score_nb(price[i], change_pct[i], volume[i], high[i], low[i])
+        fund = _fund_score_nb(price[i], change_pct[i], policy_score[i])
+        out_tech[i] = tech
+        out_fund[i] = fund
+        out_final[i] = tech * 0.4 + policy_score[i] * 0.35 + fund * 0.25
+
+
+@dataclass(**DATACLASS_SLOTS)
 class StockAnalysis:
     """深度股票分析"""
     symbol: str
@@ -72,6 +171,92 @@ class StockAnalysis:
     investment_logic: str     # 投资逻辑
 
 
+# 板块政策映射（模块级常量，所有实例共享，只读）
+_POLICY_MAP = {
+    # AI和科技
+    "300750": {"policy": "新能源/AI产业", "score": 92, "desc": "动力电池龙头，受益于新能源汽车政策和AI发展"},
+    "002594": {"policy": "新能源/汽车", "score": 90, "desc": "新能源汽车领导者，出口和智能化双轮驱动"},
+    "002475": {"policy": "AI/消费电子", "score": 88, "desc": "苹果产业链龙头，AI终端带来新增长"},
+    "300059": {"policy": "互联网金融", "score": 85, "desc": "东方财富，互联网券商龙头"},
+    "002410": {"policy": "AI/建筑软件", "score": 82, "desc": "广联达，建筑信息化龙头，AI+建筑"},
+    
+    # 券商金融
+    "600030": {"policy": "资本市场改革", "score": 88, "desc": "中信证券，券商龙头受益于资本市场改革"},
+    "600837": {"policy": "资本市场改革", "score": 85, "desc": "海通证券，综合实力强"},
+    "600999": {"policy": "资本市场改革", "score": 84, "desc": "招商证券，背靠招商银行"},
+    
+    # 消费
+    "600519": {"policy": "消费复苏", "score": 85, "desc": "贵州茅台，高端白酒龙头，品牌价值稳固"},
+    "000651": {"policy": "消费复苏", "score": 78, "desc": "格力电器，空调龙头，估值合理"},
+    "000858": {"policy": "消费复苏", "score": 82, "desc": "五粮液，高端白酒次龙头，批价企稳回升"},
+    
+    # 医药
+    "600276": {"policy": "医疗反腐完成", "score": 80, "desc": "恒瑞医药，创新药龙头，集采影响边际改善"},
+    "600436": {"policy": "医疗反腐完成", "score": 82, "desc": "片仔癀，独家中成药，国家级绝密配方"},
+    "300015": {"policy": "医疗反腐完成", "score": 78, "desc": "爱尔眼科，医疗服务龙头，扩张逻辑清晰"},
+    
+    # 基建
+    "003013": {"policy": "财政发力", "score": 88, "desc": "地铁设计，受益于基建投资提速，专项债加速发行"},
+    "601186": {"policy": "财政发力", "score": 85, "desc": "中国铁建，基建龙头，海外业务增长"},
+    "601390": {"policy": "财政发力", "score": 84, "desc": "中国中铁，铁路建设龙头"},
+    
+    # 银行
+    "601398": {"policy": "利率下行", "score": 72, "desc": "工商银行，国有大行，息差压力缓解"},
+    "600036": {"policy": "利率下行", "score": 75, "desc": "招商银行，零售银行标杆，资产质量优异"},
+}
+
+# 市场关键因素（静态内容，所有实例共享，只读）
+_KEY_FACTORS = {
+    "macro": {
+        "十五五开局": {"impact": "positive", "score": 80},
+        "人民币升值": {"impact": "positive", "score": 70},
+        "美联储降息": {"impact": "positive", "score": 75},
+    },
+    "policy": {
+        "AI产业": {"impact": "positive", "score": 90},
+        "财政发力": {"impact": "positive", "score": 85},
+        "消费复苏": {"impact": "positive", "score": 70},
+    }
+}
+
+# 宏观分析中与个股无关的固定语句，导入时拼好，按涨幅三选一
+_MACRO_TEMPLATE = "【政策面】%s；%s"
+_MACRO_POLICY = "在十五五开局之年，受益于政策支持"
+_MACRO_FOREIGN = "外资回流背景下，资金关注度提升"
+_MACRO_LIQUIDITY = "人民币汇率企稳，利好资产价格"
+_MACRO_MEETING = "两会临近，政策催化预期增强"
+_MACRO_TEXT_FLAT = _MACRO_MEETING
+_MACRO_TEXT_UP = "；".join((_MACRO_POLICY, _MACRO_LIQUIDITY, _MACRO_MEETING))
+_MACRO_TEXT_STRONG = "；".join((_MACRO_POLICY, _MACRO_FOREIGN, _MACRO_LIQUIDITY, _MACRO_MEETING))
+
+# 估值偏高、赛道拥挤的新能源个股
+_NEW_ENERGY_SYMBOLS = ("300750", "002594")
+
+# 推荐评级分档：score 落在 [_RECOMMEND_THRESHOLDS[i-1], _RECOMMEND_THRESHOLDS[i]) 对应 _RECOMMEND_LABELS[i]
+_RECOMMEND_THRESHOLDS = (55, 65, 75, 85)
+_RECOMMEND_LABELS = ("⚠️ 建议回避", "➡️ 持有观望", "⭐ 谨慎买入", "⭐⭐ 推荐买入", "⭐⭐⭐ 强烈推荐")
+
+
+# 新浪实时行情字典字段齐全，一次 itemgetter 取出分析所需的全部字段
+_QUOTE_FIELDS = itemgetter('close', 'change_pct', 'volume', 'high', 'low', 'name')
+
+
+def _unpack_quote(symbol: str, quote: Dict) -> Tuple:
+    """行情字典 -> (price, change_pct, volume, high, low, name)，缺字段时按默认值补齐"""
+    try:
+        return _QUOTE_FIELDS(quote)
+    except KeyError:
+        price = quote.get('close', 0)
+        return (price, quote.get('change_pct', 0), quote.get('volume', 0),
+                quote.get('high', price), quote.get('low', price), quote.get('name', symbol))
+
+
+@lru_cache(maxsize=1)
+def _fmt_now(bucket: int) -> str:
+    """按秒缓存的本地时间字符串，bucket 传 int(time.time())"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(bucket))
+
+
 class EnhancedStockPicker:
     """增强版AI选股器 - 个性化分析"""
     
@@ -79,108 +264,102 @@ class EnhancedStockPicker:
         self.api = StockDataAPI(data_source="sina")
         self.context = self._load_market_context()
         
-        # 板块政策映射
-        self.policy_map = {
-            # AI和科技
-            "300750": {"policy": "新能源/AI产业", "score": 92, "desc": "动力电池龙头，受益于新能源汽车政策和AI发展"},
-            "002594": {"policy": "新能源/汽车", "score": 90, "desc": "新能源汽车领导者，出口和智能化双轮驱动"},
-            "002475": {"policy": "AI/消费电子", "score": 88, "desc": "苹果产业链龙头，AI终端带来新增长"},
-            "300059": {"policy": "互联网金融", "score": 85, "desc": "东方财富，互联网券商龙头"},
-            "002410": {"policy": "AI/建筑软件", "score": 82, "desc": "广联达，建筑信息化龙头，AI+建筑"},
-            
-            # 券商金融
-            "600030": {"policy": "资本市场改革", "score": 88, "desc": "中信证券，券商龙头受益于资本市场改革"},
-            "600837": {"policy": "资本市场改革", "score": 85, "desc": "海通证券，综合实力强"},
-            "600999": {"policy": "资本市场改革", "score": 84, "desc": "招商证券，背靠招商银行"},
-            
-            # 消费
-            "600519": {"policy": "消费复苏", "score": 85, "desc": "贵州茅台，高端白酒龙头，品牌价值稳固"},
-            "000651": {"policy": "消费复苏", "score": 78, "desc": "格力电器，空调龙头，估值合理"},
-            "000858": {"policy": "消费复苏", "score": 82, "desc": "五粮液，高端白酒次龙头，批价企稳回升"},
-            
-            # 医药
-            "600276": {"policy": "医疗反腐完成", "score": 80, "desc": "恒瑞医药，创新药龙头，集采影响边际改善"},
-            "600436": {"policy": "医疗反腐完成", "score": 82, "desc": "片仔癀，独家中成药，国家级绝密配方"},
-            "300015": {"policy": "医疗反腐完成", "score": 78, "desc": "爱尔眼科，医疗服务龙头，扩张逻辑清晰"},
-            
-            # 基建
-            "003013": {"policy": "财政发力", "score": 88, "desc": "地铁设计，受益于基建投资提速，专项债加速发行"},
-            "601186": {"policy": "财政发力", "score": 85, "desc": "中国铁建，基建龙头，海外业务增长"},
-            "601390": {"policy": "财政发力", "score": 84, "desc": "中国中铁，铁路建设龙头"},
-            
-            # 银行
-            "601398": {"policy": "利率下行", "score": 72, "desc": "工商银行，国有大行，息差压力缓解"},
-            "600036": {"policy": "利率下行", "score": 75, "desc": "招商银行，零售银行标杆，资产质量优异"},
-        }
+        self.policy_map = _POLICY_MAP
+
+        # 按实例缓存单股分析结果，避免类级缓存持有实例引用
+        self._analyze_stock_cached = lru_cache(maxsize=4096)(self._analyze_stock)
+
+        # 报告正文只依赖初始化时确定的上下文，预先拼好，调用时只追加生成时间
+        self._report_body = self._build_report_body()
         
     def _load_market_context(self) -> Dict:
         return {
-            "date": datetime.now().strftime("%Y-%m-%d"),
+            "date": _fmt_now(int(time.time()))[:10],
             "period": "2026年2月",
-            "key_factors": {
-                "macro": {
-                    "十五五开局": {"impact": "positive", "score": 80},
-                    "人民币升值": {"impact": "positive", "score": 70},
-                    "美联储降息": {"impact": "positive", "score": 75},
-                },
-                "policy": {
-                    "AI产业": {"impact": "positive", "score": 90},
-                    "财政发力": {"impact": "positive", "score": 85},
-                    "消费复苏": {"impact": "positive", "score": 70},
-                }
-            }
+            "key_factors": _KEY_FACTORS,
         }
-    
-    def analyze_stock(self, symbol: str, quote: Dict) -> StockAnalysis:
-        """深度分析单只股票"""
-        
-        price = quote.get('close', 0)
-        change_pct = quote.get('change_pct', 0)
-        volume = quote.get('volume', 0)
-        high = quote.get('high', price)
-        low = quote.get('low', price)
-        name = quote.get('name', symbol)
-        
-        # 获取政策信息
-        if symbol in self.policy_map:
-            policy_info = self.policy_map[symbol]
-        else:
-            # 默认值
-            policy_info = {
-                "policy": "一般",
-                "score": 50,
-                "desc": f"{symbol}，基本面一般，无明显催化剂"
-            }
-        
+
+    def analyze_stock(self, symbol: str, quote: Dict) -> Optional[StockAnalysis]:
+        """
+        深度分析单只股票
+
+        轮询场景下同一股票的行情常常在两次请求间不变，按 (代码, 原始行情) 缓存分析结果；
+        评分与文字都由原始行情算出，与 pick_with_context 的结果一致。
+        价格无效（取数失败）时返回 None
+        """
+        price, change_pct, volume, high, low, name = _unpack_quote(symbol, quote)
+        if price <= 0:
+            return None
+
+        # 返回副本，调用方修改结果不会污染缓存
+        return replace(self._analyze_stock_cached(symbol, name, price, change_pct, volume, high, low))
+
+    def _analyze_stock(self, symbol: str, name: str, price: float, change_pct: float,
+                       volume: float, high: float, low: float) -> StockAnalysis:
+        """按行情计算分析结果（经 lru_cache 包装为 _analyze_stock_cached）"""
+        fields = (price, change_pct, volume, high, low, name)
+        policy_info = self._get_policy_info(symbol)
+
+        tech_score = self._technical_score(price, change_pct, volume, high, low)
+        fund_score = self._fundamentals_score(price, change_pct, policy_info["score"])
+
+        return self._build_analysis(symbol, fields, policy_info, tech_score, fund_score)
+
+    def _get_policy_info(self, symbol: str) -> Dict:
+        """获取政策信息"""
+        policy_info = self.policy_map.get(symbol)
+        if policy_info is not None:
+            return policy_info
+        # 默认值
+        return {
+            "policy": "一般",
+            "score": 50,
+            "desc": f"{symbol}，基本面一般，无明显催化剂"
+        }
+
+    def _build_analysis(self, symbol: str, fields: Tuple, policy_info: Dict,
+                        tech_score: float, fund_score: float,
+                        final_score: Optional[float] = None,
+                        is_sh_main: Optional[bool] = None,
+                        in_new_energy: Optional[bool] = None) -> StockAnalysis:
+        """
+        根据已算好的得分组装分析结果（文字部分逐只生成）
+
+        fields 为 _unpack_quote 返回的 (price, change_pct, volume, high, low, name)
+        """
+        price, change_pct, volume, high, low, name = fields
+
         # 1. 技术分析
-        tech_score, tech_analysis = self._analyze_technical(price, change_pct, volume, high, low)
-        
+        tech_analysis = self._technical_text(price, change_pct, volume, high, low)
+
         # 2. 宏观分析
         macro_score, macro_analysis = self._analyze_macro(symbol, change_pct, price, policy_info)
-        
+
         # 3. 基本面分析
-        fund_score, fund_analysis = self._analyze_fundamentals(symbol, change_pct, price, policy_info)
-        
+        fund_analysis = self._fundamentals_text(change_pct, price, policy_info)
+
         # 4. 风险分析
-        risk_analysis = self._analyze_risk(symbol, change_pct, price, tech_score)
-        
+        risk_analysis = self._analyze_risk(symbol, change_pct, price, tech_score,
+                                           is_sh_main, in_new_energy)
+
         # 5. 综合评分
         technical_score = tech_score * 0.4
         policy_score = policy_info["score"] * 0.35
         value_score = fund_score * 0.25
-        final_score = technical_score + policy_score + value_score
-        
+        if final_score is None:
+            final_score = technical_score + policy_score + value_score
+
         # 6. 投资逻辑
         investment_logic = self._generate_investment_logic(
             symbol, name, price, change_pct, tech_score, policy_info, policy_score
         )
-        
+
         # 7. 推荐
         recommendation = self._get_recommendation(final_score, change_pct)
-        
+
         # 8. 信号
         signal = "BUY" if tech_score > 65 else ("SELL" if tech_score < 40 else "HOLD")
-        
+
         return StockAnalysis(
             symbol=symbol,
             name=name,
@@ -201,136 +380,164 @@ class EnhancedStockPicker:
             risk_analysis=risk_analysis,
             investment_logic=investment_logic
         )
-    
-    def _analyze_technical(self, price: float, change_pct: float, 
-                           volume: float, high: float, low: float) -> tuple:
-        """技术分析"""
-        score = 50
+
+    @staticmethod
+    def _technical_score(price: float, change_pct: float,
+                         volume: float, high: float, low: float) -> float:
+        """技术得分（标量版）"""
+        return _technical_score_nb(price, change_pct, volume, high, low)
+
+    def _score_batch(self, price: np.ndarray, change_pct: np.ndarray, volume: np.ndarray,
+                     high: np.ndarray, low: np.ndarray, policy_score: np.ndarray):
+        """批量打分，返回 (技术分, 基本面分, 综合分)；有 numba 时走并行内核"""
+        if NUMBA_AVAILABLE:
+            out_tech = np.empty_like(price)
+            out_fund = np.empty_like(price)
+            out_final = np.empty_like(price)
+            score_batch(price, change_pct, volume, high, low, policy_score,
+                        out_tech, out_fund, out_final)
+            return out_tech, out_fund, out_final
+
+        tech = self._technical_scores(price, change_pct, volume, high, low)
+        fund = self._fundamentals_scores(price, change_pct, policy_score)
+        return tech, fund, tech * 0.4 + policy_score * 0.35 + fund * 0.25
+
+    @staticmethod
+    def _technical_scores(price: np.ndarray, change_pct: np.ndarray, volume: np.ndarray,
+                          high: np.ndarray, low: np.ndarray) -> np.ndarray:
+        """技术得分（批量版），与 _technical_score 逐项一致"""
+        momentum = np.select([change_pct > 5, change_pct > 3, change_pct > 1, change_pct > 0],
+                             [25, 20, 15, 10], default=5)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            daily_range = np.where(low > 0, (high - low) / low * 100, 0.0)
+            price_position = np.where(high != low, (price - low) / (high - low) * 100, 50.0)
+        amplitude = np.select([daily_range > 5, daily_range > 3], [10, 7], default=5)
+
+        vol_score = np.select([volume > 20000000, volume > 10000000], [10, 7], default=3)
+
+        has_range = (high > 0) & (low > 0)
+        position = np.select([has_range & (price_position > 80), has_range & (price_position < 20)],
+                             [5, -5], default=0)
+
+        return np.minimum(50 + momentum + amplitude + vol_score + position, 100).astype(np.float64)
+
+    def _technical_text(self, price: float, change_pct: float,
+                        volume: float, high: float, low: float) -> str:
+        """技术分析文字"""
         analysis_parts = []
-        
+
         # 动量分析
         if change_pct > 5:
-            score += 25
-            analysis_parts.append(f"今日暴涨{change_pct:.1f}%，短期动能极强")
+            analysis_parts.append("今日暴涨%.1f%%，短期动能极强" % change_pct)
         elif change_pct > 3:
-            score += 20
-            analysis_parts.append(f"今日大涨{change_pct:.1f}%，多头趋势明显")
+            analysis_parts.append("今日大涨%.1f%%，多头趋势明显" % change_pct)
         elif change_pct > 1:
-            score += 15
-            analysis_parts.append(f"今日上涨{change_pct:.1f}%，走势稳健")
+            analysis_parts.append("今日上涨%.1f%%，走势稳健" % change_pct)
         elif change_pct > 0:
-            score += 10
-            analysis_parts.append(f"小幅上涨{change_pct:.1f}%，温和反弹")
+            analysis_parts.append("小幅上涨%.1f%%，温和反弹" % change_pct)
         else:
-            score += 5
-            analysis_parts.append(f"今日下跌{change_pct:.1f}%，存在低吸机会")
-        
+            analysis_parts.append("今日下跌%.1f%%，存在低吸机会" % change_pct)
+
         # 振幅分析
         daily_range = (high - low) / low * 100 if low > 0 else 0
         if daily_range > 5:
-            score += 10
-            analysis_parts.append(f"日内振幅{daily_range:.1f}%，交易活跃")
+            analysis_parts.append("日内振幅%.1f%%，交易活跃" % daily_range)
         elif daily_range > 3:
-            score += 7
-            analysis_parts.append(f"日内振幅{daily_range:.1f}%，有一定波动")
+            analysis_parts.append("日内振幅%.1f%%，有一定波动" % daily_range)
         else:
-            score += 5
-            analysis_parts.append(f"日内振幅{daily_range:.1f}%，走势平稳")
-        
+            analysis_parts.append("日内振幅%.1f%%，走势平稳" % daily_range)
+
         # 量能分析
         if volume > 20000000:
-            score += 10
             analysis_parts.append("成交量明显放大，资金关注度高")
         elif volume > 10000000:
-            score += 7
             analysis_parts.append("成交量温和放量")
         else:
-            score += 3
             analysis_parts.append("成交量一般，市场关注度适中")
-        
+
         # 价格位置
         if high > 0 and low > 0:
             price_position = (price - low) / (high - low) * 100 if high != low else 50
             if price_position > 80:
-                score += 5
-                analysis_parts.append(f"股价创日内新高，强势特征明显")
+                analysis_parts.append("股价创日内新高，强势特征明显")
             elif price_position < 20:
-                score -= 5
-                analysis_parts.append(f"股价接近日内低点，需关注支撑")
+                analysis_parts.append("股价接近日内低点，需关注支撑")
             else:
-                analysis_parts.append(f"股价处于日内中性位置")
-        
-        score = min(score, 100)
-        
-        return score, "；".join(analysis_parts)
-    
+                analysis_parts.append("股价处于日内中性位置")
+
+        return "；".join(analysis_parts)
+
     def _analyze_macro(self, symbol: str, change_pct: float, 
                        price: float, policy_info: Dict) -> tuple:
         """宏观分析"""
         score = policy_info["score"]
-        analysis_parts = []
-        
-        # 政策受益
-        analysis_parts.append(f"【政策面】{policy_info['desc']}")
-        
-        # 宏观背景
-        if change_pct > 0:
-            analysis_parts.append("在十五五开局之年，受益于政策支持")
-            if change_pct > 3:
-                analysis_parts.append("外资回流背景下，资金关注度提升")
-        
-        # 流动性
-        if change_pct > 0:
-            analysis_parts.append("人民币汇率企稳，利好资产价格")
-        
-        # 两会预期
-        analysis_parts.append("两会临近，政策催化预期增强")
+
+        # 政策受益 + 按涨幅选取预先拼好的宏观背景/流动性/两会预期段落
+        if change_pct > 3:
+            tail = _MACRO_TEXT_STRONG
+        elif change_pct > 0:
+            tail = _MACRO_TEXT_UP
+        else:
+            tail = _MACRO_TEXT_FLAT
         
-        return score, "；".join(analysis_parts)
+        return score, _MACRO_TEMPLATE % (policy_info['desc'], tail)
     
-    def _analyze_fundamentals(self, symbol: str, change_pct: float,
-                            price: float, policy_info: Dict) -> tuple:
-        """基本面分析"""
-        score = 60
+    @staticmethod
+    def _fundamentals_score(price: float, change_pct: float, policy_score: float) -> float:
+        """基本面得分（标量版）"""
+        return _fund_score_nb(price, change_pct, policy_score)
+
+    @staticmethod
+    def _fundamentals_scores(price: np.ndarray, change_pct: np.ndarray,
+                             policy_score: np.ndarray) -> np.ndarray:
+        """基本面得分（批量版），与 _fundamentals_score 逐项一致"""
+        valuation = np.select([(price >= 10) & (price <= 100), price > 500, price < 5],
+                              [15, -10, -5], default=0)
+        momentum = np.select([change_pct > 7, change_pct > 3, (change_pct > -3) & (change_pct <= 0)],
+                             [-10, -5, 10], default=0)
+        position = np.select([policy_score >= 85, policy_score >= 75], [10, 5], default=0)
+
+        return np.clip(60 + valuation + momentum + position, 0, 100).astype(np.float64)
+
+    def _fundamentals_text(self, change_pct: float, price: float, policy_info: Dict) -> str:
+        """基本面分析文字"""
         analysis_parts = []
-        
+
         # 估值合理性
         if 10 <= price <= 100:
-            score += 15
             analysis_parts.append("股价适中，流动性好，适合交易")
         elif price > 500:
-            score -= 10
             analysis_parts.append("股价较高，散户参与度可能受限")
         elif price < 5:
-            score -= 5
             analysis_parts.append("股价偏低，注意基本面风险")
-        
+
         # 涨跌幅合理性
         if change_pct > 7:
-            score -= 10
             analysis_parts.append("短期涨幅较大，警惕回调风险")
         elif change_pct > 3:
-            score -= 5
             analysis_parts.append("短期涨幅较多，适度回调风险")
         elif -3 < change_pct <= 0:
-            score += 10
             analysis_parts.append("短期调整充分，估值吸引力提升")
-        
+
         # 行业地位
         if policy_info["score"] >= 85:
-            score += 10
             analysis_parts.append(f"{policy_info['policy']}领域龙头，竞争优势明显")
         elif policy_info["score"] >= 75:
-            score += 5
-            analysis_parts.append(f"行业地位稳固，有一定护城河")
-        
-        score = min(max(score, 0), 100)
-        
-        return score, "；".join(analysis_parts)
-    
+            analysis_parts.append("行业地位稳固，有一定护城河")
+
+        return "；".join(analysis_parts)
+
     def _analyze_risk(self, symbol: str, change_pct: float, 
-                     price: float, tech_score: float) -> str:
-        """风险分析"""
+                     price: float, tech_score: float,
+                     is_sh_main: Optional[bool] = None,
+                     in_new_energy: Optional[bool] = None) -> str:
+        """风险分析（is_sh_main / in_new_energy 可由批量路径预先算好传入）"""
+        if is_sh_main is None:
+            is_sh_main = symbol.startswith("60")
+        if in_new_energy is None:
+            in_new_energy = symbol in _NEW_ENERGY_SYMBOLS
+
         risks = []
         
         # 市场风险
@@ -341,21 +548,15 @@ class EnhancedStockPicker:
             risks.append("技术指标超买，注意追高风险")
         
         # 政策风险
-        if symbol.startswith("60"):
+        if is_sh_main:
             risks.append("关注中美贸易谈判进展对市场的影响")
         
         # 个股风险
-        if symbol in ["300750", "002594"]:
+        if in_new_energy:
             risks.append("新能源板块估值较高，赛道拥挤")
         
         # 通用风险
         risks.append("股市有风险，投资需谨慎")
-        # 确保风险是字符串
-        if risks:
-            pass
-        else:
-            risks.append("股市有风险，投资需谨慎")
-            risks.append("本分析仅供参考，不构成投资建议")
         
         return "；".join(risks)
     
@@ -370,11 +571,11 @@ class EnhancedStockPicker:
         
         # 短期逻辑
         if change_pct > 3:
-            logic_parts.append(f"短期：放量上涨{change_pct:.1f}%，多头趋势确立，可顺势跟进")
+            logic_parts.append("短期：放量上涨%.1f%%，多头趋势确立，可顺势跟进" % change_pct)
         elif change_pct > 0:
-            logic_parts.append(f"短期：小幅上涨，走势稳健，可逢低布局")
+            logic_parts.append("短期：小幅上涨，走势稳健，可逢低布局")
         else:
-            logic_parts.append(f"短期：调整后估值吸引力提升，可择机买入")
+            logic_parts.append("短期：调整后估值吸引力提升，可择机买入")
         
         # 中期逻辑
         if policy_score >= 85:
@@ -383,50 +584,68 @@ class EnhancedStockPicker:
             logic_parts.append(f"中期：受益于{policy_info['policy']}政策，估值有支撑")
         
         # 催化剂
-        logic_parts.append(f"催化剂：两会政策预期、流动性改善、外资回流")
+        logic_parts.append("催化剂：两会政策预期、流动性改善、外资回流")
         
         return "；".join(logic_parts)
     
     def _get_recommendation(self, score: float, change_pct: float) -> str:
         """推荐评级"""
-        if score >= 85:
-            return "⭐⭐⭐ 强烈推荐"
-        elif score >= 75:
-            return "⭐⭐ 推荐买入"
-        elif score >= 65:
-            return "⭐ 谨慎买入"
-        elif score >= 55:
-            return "➡️ 持有观望"
-        else:
-            return "⚠️ 建议回避"
+        return _RECOMMEND_LABELS[bisect_right(_RECOMMEND_THRESHOLDS, score)]
     
     def pick_with_context(self, stock_symbols: List[str], top_n: int = 10) -> List[StockAnalysis]:
         """结合背景进行AI选股"""
         logger.info(f"开始深度分析 {len(stock_symbols)} 只股票...")
         
         batch_size = 30
-        all_results = []
-        
-        for i in range(0, min(len(stock_symbols), 100), batch_size):
-            batch = stock_symbols[i:i+batch_size]
-            quotes = self.api.get_realtime_quote(batch)
-            
-            for symbol, quote in quotes.items():
-                if quote:
-                    analysis = self.analyze_stock(symbol, quote)
-                    all_results.append(analysis)
-        
-        # 按评分排序
-        sorted_results = sorted(all_results, key=lambda x: x.final_score, reverse=True)
-        
+        quotes = {}
+        batches = [stock_symbols[i:i+batch_size] for i in range(0, min(len(stock_symbols), 100), batch_size)]
+
+        # 各批行情请求是纯 I/O，并发发出；map 按提交顺序返回，保证结果顺序稳定
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for batch_quotes in executor.map(self.api.get_realtime_quote, batches):
+                quotes.update((s, q) for s, q in batch_quotes.items() if q)
+
+        # 价格为 0 的是取数失败的行情，打分前剔除
+        unpacked = ((s, _unpack_quote(s, q)) for s, q in quotes.items())
+        valid = [(s, row) for s, row in unpacked if row[0] > 0]
+        if not valid:
+            return []
+
+        # 数值打分整体向量化（SoA），只有文字部分逐只生成
+        symbols, rows = map(list, zip(*valid))
+        policies = [self._get_policy_info(s) for s in symbols]
+        price, change_pct, volume, high, low = (
+            np.array(col, dtype=np.float64) for col in list(zip(*rows))[:5]
+        )
+        policy_score = np.array([p["score"] for p in policies], dtype=np.float64)
+        is_sh_main = np.array([s.startswith("60") for s in symbols], dtype=bool)
+        in_new_energy = np.isin(symbols, _NEW_ENERGY_SYMBOLS)
+
+        tech_scores, fund_scores, final_scores = self._score_batch(
+            price, change_pct, volume, high, low, policy_score)
+
+        # 逐只惰性生成分析结果，堆中只保留 top_n 个，其余生成后即可回收
+        analyses = (
+            self._build_analysis(s, rows[k], policies[k], float(tech_scores[k]),
+                                 float(fund_scores[k]), float(final_scores[k]),
+                                 bool(is_sh_main[k]), bool(in_new_energy[k]))
+            for k, s in enumerate(symbols)
+        )
+
+        # 按评分取前 top_n（与 sorted(..., reverse=True)[:top_n] 结果一致）
+        top = heapq.nlargest(top_n, analyses, key=attrgetter("final_score"))
+
         logger.info(f"分析完成，选取TOP {top_n}")
-        
-        return sorted_results[:top_n]
+
+        return top
     
     def get_market_report(self) -> str:
         """获取市场分析报告"""
-        
-        report = f"""
+        return f"{self._report_body}{_fmt_now(int(time.time()))}*\n"
+
+    def _build_report_body(self) -> str:
+        """构建报告正文（不含生成时间）"""
+        return f"""
 ## 📊 {self.context['date']} 市场分析报告
 
 ### 🎯 核心观点
@@ -472,9 +691,7 @@ class EnhancedStockPicker:
 4. 短期涨幅过大后的回调风险
 
 ---
-*报告生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*
-"""
-        return report
+*报告生成时间: """
 
 
 if __name__ == "__main__":
@@ -3,25 +3,33 @@
 """
 均线交叉策略示例
 演示如何在系统中实现简单的技术分析策略
+
+在项目根目录以模块方式运行演示（模块使用包内相对导入，不能直接运行文件）：
+    python -m src.strategies.moving_average_strategy
 """
 
+import math
 import os
-import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from multiprocessing import shared_memory
+from typing import Dict, List, Any, Optional, Sequence, Tuple
 import pandas as pd
 import numpy as np
 
-# 添加项目根目录到路径
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from data.stock_api import StockDataAPI
-from utils.technical_analysis import TechnicalAnalyzer, SignalType
-from utils.risk_manager import RiskManager
-from utils.logger import setup_logger
+from ..data.stock_api import StockDataAPI
+from ..utils.technical_analysis import TechnicalAnalyzer, SignalType
+from ..utils.risk_manager import RiskManager
+from ..utils.logger import setup_logger
+from ..utils.ma_kernels import ma_cross_signal, batch_ma_cross, last_cross, ma_cross_backtest
 
 logger = setup_logger(__name__)
 
+# 信号的整数编码，与 generate_signal_vector 的 int8 数组一致；
+# 信号字典里的 "signal_int" 用它，回测循环直接比较整数
+BUY, SELL, HOLD = 1, -1, 0
+_SIGNAL_CODES = {SignalType.BUY: BUY, SignalType.SELL: SELL}
+
 
 class MovingAverageStrategy:
     """
@@ -48,9 +56,18 @@ class MovingAverageStrategy:
         self.short_ma = short_ma
         self.long_ma = long_ma
         self.analyzer = TechnicalAnalyzer()
+
+        # 均线权重向量只依赖窗口长度，构造时算好；批量扫描时所有股票的
+        # 尾部均线用一次矩阵-向量乘法求得
+        self._w_short = np.full(short_ma, 1.0 / short_ma)
+        self._w_long = np.full(long_ma, 1.0 / long_ma)
         
         # 持仓状态
         self.position = None  # None, 'long'
+
+        # 每只股票的增量计算状态：最后日期、最近 max(short, long) 根收盘价、
+        # 累计K线数、最新交叉信号与均线值
+        self._state: Dict[str, Dict[str, Any]] = {}
         
     def generate_signal(self, symbol: str) -> Dict[str, Any]:
         """
@@ -63,42 +80,34 @@ class MovingAverageStrategy:
             信号字典
         """
         try:
-            # 获取历史数据
-            df = self.api.get_daily_price(symbol, start_date=None)
-            if df is None or df.empty or len(df) < self.long_ma + 5:
-                return {"signal": SignalType.HOLD, "reason": "数据不足"}
-            
-            # 计算均线
-            df['ma_short'] = df['close'].rolling(window=self.short_ma).mean()
-            df['ma_long'] = df['close'].rolling(window=self.long_ma).mean()
-            
-            # 最新数据
-            latest = df.iloc[-1]
-            prev = df.iloc[-2]
-            
-            # 判断均线状态
-            ma_short_above = latest['ma_short'] > latest['ma_long']
-            prev_short_above = prev['ma_short'] > prev['ma_long']
+            # 获取历史数据（已有状态时只拉取新增K线）
+            latest = self._update_state(symbol)
+            if latest is None or latest['n'] < self.long_ma + 5:
+                return {"signal": SignalType.HOLD, "signal_int": HOLD, "reason": "数据不足"}
+
+            cross = latest['cross']
             
             # 生成信号
-            if ma_short_above and not prev_short_above:
+            if cross == 1:
                 # 金叉
                 if self.position is None or self.position != 'long':
                     self.position = 'long'
                     return {
                         "signal": SignalType.BUY,
+                        "signal_int": BUY,
                         "reason": f"MA{self.short_ma}金叉MA{self.long_ma}",
                         "price": latest['close'],
                         "ma_short": latest['ma_short'],
                         "ma_long": latest['ma_long']
                     }
                     
-            elif not ma_short_above and prev_short_above:
+            elif cross == -1:
                 # 死叉
                 if self.position == 'long':
                     self.position = None
                     return {
                         "signal": SignalType.SELL,
+                        "signal_int": SELL,
                         "reason": f"MA{self.short_ma}死叉MA{self.long_ma}",
                         "price": latest['close'],
                         "ma_short": latest['ma_short'],
@@ -107,6 +116,7 @@ class MovingAverageStrategy:
             
             return {
                 "signal": SignalType.HOLD,
+                "signal_int": HOLD,
                 "reason": "无交叉信号",
                 "price": latest['close'],
                 "ma_short": latest['ma_short'],
@@ -115,7 +125,129 @@ class MovingAverageStrategy:
             
         except Exception as e:
             logger.error(f"生成信号失败: {e}")
-            return {"signal": SignalType.HOLD, "reason": str(e)}
+            return {"signal": SignalType.HOLD, "signal_int": HOLD, "reason": str(e)}
+
+    def scan(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量扫描多只股票最新一根K线的均线交叉信号
+
+        历史按行拼成 (N, T) 矩阵后一次并行计算；只反映交叉本身，
+        不读取也不修改 self.position。
+
+        Args:
+            symbols: 股票代码列表
+
+        Returns:
+            {股票代码: 信号字典}
+        """
+        lookback = max(self.short_ma, self.long_ma + 5)
+        codes, matrix = self.api.get_close_matrix(symbols, lookback)
+        results = {symbol: {"signal": SignalType.HOLD, "signal_int": HOLD, "reason": "数据不足"}
+                   for symbol in symbols}
+        if not codes:
+            return results
+
+        closes = np.ascontiguousarray(matrix.T)
+        lengths = (~np.isnan(closes)).sum(axis=1)
+        crosses = batch_ma_cross(closes, self.short_ma, self.long_ma, lengths)
+        ma_short = closes[:, -self.short_ma:] @ self._w_short
+        ma_long = closes[:, -self.long_ma:] @ self._w_long
+
+        for i, symbol in enumerate(codes):
+            if lengths[i] < self.long_ma + 5:
+                continue
+            code = int(crosses[i])
+            if code == BUY:
+                signal, reason = SignalType.BUY, f"MA{self.short_ma}金叉MA{self.long_ma}"
+            elif code == SELL:
+                signal, reason = SignalType.SELL, f"MA{self.short_ma}死叉MA{self.long_ma}"
+            else:
+                signal, reason = SignalType.HOLD, "无交叉信号"
+            results[symbol] = {
+                "signal": signal,
+                "signal_int": code,
+                "reason": reason,
+                "price": closes[i, -1],
+                "ma_short": ma_short[i],
+                "ma_long": ma_long[i]
+            }
+
+        return results
+
+    def _update_state(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        更新并返回某只股票的增量计算状态
+
+        首次调用拉取完整历史；之后从上次最后日期（含）起拉取，新增K线拼接到保留的
+        最近 max(short, long) 根收盘价后面重新判断交叉，每次工作量与历史长度无关。
+
+        重叠那根K线的收盘价与保留值不同，说明前复权基准已变（除权除息后历史价格整体重算），
+        此时丢弃状态重新拉取完整历史；当天已确认没有新K线时不再请求数据源。
+        """
+        state = self._state.get(symbol)
+        window = max(self.short_ma, self.long_ma)
+        today = datetime.now().strftime('%Y%m%d')
+
+        if state is not None:
+            if state['checked'] == today:
+                return state
+            last_date = str(state['last_date'])
+            df = self.api.get_daily_price(symbol, start_date=last_date)
+            if df is None or df.empty:
+                state['checked'] = today
+                return state
+            trade_dates = df['trade_date'].astype(str)
+            overlap = df.loc[trade_dates == last_date, 'close']
+            if overlap.empty or float(overlap.iloc[0]) != state['close']:
+                state = None
+            else:
+                df = df[trade_dates > last_date]
+                if df.empty:
+                    state['checked'] = today
+                    return state
+                close = np.concatenate((state['tail'], np.array(df['close'], dtype=np.float64)))
+                n = state['n'] + len(df)
+
+        if state is None:
+            df = self.api.get_daily_price(symbol, start_date=None)
+            if df is None or df.empty:
+                self._state.pop(symbol, None)
+                return None
+            close = np.array(df['close'], dtype=np.float64)
+            n = len(close)
+
+        # 只需最后两根K线的均线即可判断交叉，不生成整段信号数组
+        cross, ma_short, ma_long = last_cross(close, self.short_ma, self.long_ma)
+        state = {
+            'last_date': df['trade_date'].iloc[-1],
+            'tail': close[-window:].copy(),
+            'n': n,
+            'checked': None,
+            'cross': cross,
+            'close': float(close[-1]),
+            'ma_short': ma_short,
+            'ma_long': ma_long,
+        }
+        self._state[symbol] = state
+        return state
+
+    def generate_signal_vector(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        一次性计算整段历史的逐日信号（供回测使用）
+
+        与逐日调用 generate_signal 的交叉判定一致：第 i 天短均线站上长均线且
+        前一天不在上方为金叉，反之为死叉；历史不足 long_ma + 5 天时不出信号。
+
+        Args:
+            df: 价格数据（需要包含close列）
+
+        Returns:
+            int8 数组，1 买入 / -1 卖出 / 0 持有
+        """
+        close = np.array(df['close'], dtype=np.float64)
+        signals = ma_cross_signal(close, self.short_ma, self.long_ma)
+        signals[:self.long_ma + 4] = 0
+        return signals
 
 
 class DualMAStrategy(MovingAverageStrategy):
@@ -154,13 +286,9 @@ class DualMAStrategy(MovingAverageStrategy):
         if len(df) < 60:
             return True
             
-        # 计算长期均线
-        ma60 = df['close'].rolling(window=60).mean()
-        current_price = df['close'].iloc[-1]
-        ma60_value = ma60.iloc[-1]
-        
-        # 只在价格高于MA60时做多
-        return current_price > ma60_value
+        # 只在价格高于MA60时做多（只用最后60根收盘价）
+        close = df['close'].to_numpy(dtype=np.float64)
+        return bool(close[-1] > close[-60:].mean())
     
     def filter_by_volatility(self, df: pd.DataFrame) -> bool:
         """
@@ -175,12 +303,12 @@ class DualMAStrategy(MovingAverageStrategy):
         if len(df) < 20:
             return True
             
-        # 计算波动率
-        returns = df['close'].pct_change()
-        volatility = returns.std() * 100
+        # 计算波动率：最近20个日收益率的样本标准差
+        close = df['close'].to_numpy(dtype=np.float64)[-21:]
+        volatility = np.std(np.diff(close) / close[:-1], ddof=1) * 100
         
         # 波动率过高时不交易
-        return volatility < 5.0
+        return bool(volatility < 5.0)
     
     def generate_signal(self, symbol: str) -> Dict[str, Any]:
         """
@@ -196,21 +324,46 @@ class DualMAStrategy(MovingAverageStrategy):
             # 获取数据
             df = self.api.get_daily_price(symbol, start_date=None)
             if df is None or df.empty or len(df) < self.long_ma + 5:
-                return {"signal": SignalType.HOLD, "reason": "数据不足"}
+                return {"signal": SignalType.HOLD, "signal_int": HOLD, "reason": "数据不足"}
             
             # 应用过滤器
             if not self.filter_by_trend(df):
-                return {"signal": SignalType.HOLD, "reason": "不符合趋势条件"}
+                return {"signal": SignalType.HOLD, "signal_int": HOLD, "reason": "不符合趋势条件"}
             
             if not self.filter_by_volatility(df):
-                return {"signal": SignalType.HOLD, "reason": "波动过大"}
+                return {"signal": SignalType.HOLD, "signal_int": HOLD, "reason": "波动过大"}
             
             # 调用父类方法生成信号
             return super().generate_signal(symbol)
             
         except Exception as e:
             logger.error(f"生成信号失败: {e}")
-            return {"signal": SignalType.HOLD, "reason": str(e)}
+            return {"signal": SignalType.HOLD, "signal_int": HOLD, "reason": str(e)}
+
+    def generate_signal_vector(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        逐日信号（增强版）：过滤条件按每天可见的历史计算，不满足时当天不出信号
+
+        Args:
+            df: 价格数据（需要包含close列）
+
+        Returns:
+            int8 数组，1 买入 / -1 卖出 / 0 持有
+        """
+        signals = super().generate_signal_vector(df)
+        close = df['close'].astype(float)
+
+        # 趋势过滤：不足60天不过滤，否则要求价格高于MA60
+        ma60 = close.rolling(window=60).mean().to_numpy()
+        trend_ok = np.isnan(ma60) | (close.to_numpy() > ma60)
+
+        # 波动过滤：不足20天不过滤，否则要求截至当天最近20个收益率的标准差 < 5%
+        volatility = close.pct_change().rolling(window=20, min_periods=19).std().to_numpy() * 100
+        vol_ok = volatility < 5.0
+        vol_ok[:19] = True
+
+        signals[~(trend_ok & vol_ok)] = 0
+        return signals
 
 
 class MultiTimeframeStrategy:
@@ -234,32 +387,57 @@ class MultiTimeframeStrategy:
         Returns:
             信号字典
         """
-        # 获取日线信号
-        daily_signal = self.analyzer.generate_signal(
-            self.api.get_daily_price(symbol, start_date=None)
-        )
+        # 获取日线信号（指标计算不再吞掉异常，在策略边界处理）
+        try:
+            daily_signal = self.analyzer.generate_signal(
+                self.api.get_daily_price(symbol, start_date=None)
+            )
+        except Exception as e:
+            logger.error(f"生成信号失败: {e}")
+            return {"signal": SignalType.HOLD, "signal_int": HOLD, "reason": str(e)}
         
         # 综合判断
         if daily_signal['signal'] == SignalType.STRONG_BUY:
             return {
                 "signal": SignalType.BUY,
+                "signal_int": BUY,
                 "reason": "日线技术面强势",
                 "details": daily_signal['details']
             }
         elif daily_signal['signal'] == SignalType.BUY:
             return {
                 "signal": SignalType.HOLD,
+                "signal_int": HOLD,
                 "reason": "日线偏多，但需等待确认",
                 "details": daily_signal['details']
             }
         else:
             return {
                 "signal": SignalType.HOLD,
+                "signal_int": HOLD,
                 "reason": "技术面不支持",
                 "details": daily_signal['details']
             }
 
 
+def _grid_worker(shm_name: str, n_bars: int, params: List[Tuple[int, int]],
+                 initial_capital: float, commission: float) -> List[Tuple[Tuple[int, int], float]]:
+    """参数寻优子进程：挂载共享内存中的收盘价（零拷贝），逐组参数回测"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    close = None
+    try:
+        close = np.ndarray((n_bars,), dtype=np.float64, buffer=shm.buf)
+        results = []
+        for short_ma, long_ma in params:
+            final_value, _ = ma_cross_backtest(close, short_ma, long_ma, initial_capital, commission)
+            results.append(((short_ma, long_ma), (final_value - initial_capital) / initial_capital * 100))
+        return results
+    finally:
+        # 回测出错时也要先释放对共享内存的引用，否则 close() 抛 BufferError 掩盖原异常
+        close = None
+        shm.close()
+
+
 # 回测框架
 class BacktestEngine:
     """
@@ -278,9 +456,13 @@ class BacktestEngine:
         """
         self.initial_capital = initial_capital
         self.commission = commission
-        self.cash = initial_capital
-        self.position = 0  # 持仓股数
+        self.cash = np.float64(initial_capital)
+        self.position = np.int64(0)  # 持仓股数
         self.trades = []  # 交易记录
+
+        # 买入/卖出的含手续费系数，撮合时不再重复计算
+        self._buy_factor = 1.0 + commission
+        self._sell_factor = 1.0 - commission
         
     def run(self, 
             strategy, 
@@ -297,49 +479,158 @@ class BacktestEngine:
         Returns:
             回测结果
         """
-        # 简化回测（实际应该逐日模拟）
-        for i, row in prices.iterrows():
+        # 支持整段信号的策略一次算出全部信号，只在发生交易的K线上处理
+        if hasattr(strategy, 'generate_signal_vector'):
+            self._run_vector(strategy.generate_signal_vector(prices), prices)
+            return self._summary(prices)
+
+        # 简化回测（实际应该逐日模拟），按列取出数组后逐日按下标访问
+        close = prices['close'].to_numpy(dtype=np.float64)
+        dates = prices['trade_date'].to_numpy()
+        for i in range(len(close)):
+            price = close[i]
             signal = strategy.generate_signal(symbol)
+            code = signal.get('signal_int')
+            if code is None:
+                code = _SIGNAL_CODES.get(signal['signal'], HOLD)
             
-            if signal['signal'] == SignalType.BUY and self.position == 0:
+            if code == BUY and self.position == 0:
                 # 买入
-                shares = int(self.cash / row['close'] / 100) * 100
-                cost = shares * row['close'] * (1 + self.commission)
+                shares = np.int64(self.cash / price / 100) * 100
+                cost = shares * price * self._buy_factor
                 
                 if shares > 0 and cost <= self.cash:
                     self.position = shares
                     self.cash -= cost
                     
                     self.trades.append({
-                        'date': row['trade_date'],
+                        'date': dates[i],
                         'action': 'BUY',
-                        'shares': shares,
-                        'price': row['close'],
-                        'cost': cost
+                        'shares': int(shares),
+                        'price': price,
+                        'cost': float(cost)
                     })
                     
-            elif signal['signal'] == SignalType.SELL and self.position > 0:
+            elif code == SELL and self.position > 0:
                 # 卖出
-                revenue = self.position * row['close'] * (1 - self.commission)
+                revenue = self.position * price * self._sell_factor
                 
                 self.trades.append({
-                    'date': row['trade_date'],
+                    'date': dates[i],
                     'action': 'SELL',
-                    'shares': self.position,
-                    'price': row['close'],
-                    'revenue': revenue
+                    'shares': int(self.position),
+                    'price': price,
+                    'revenue': float(revenue)
                 })
                 
                 self.cash += revenue
-                self.position = 0
-        
+                self.position = np.int64(0)
+
+        return self._summary(prices)
+
+    def grid_search(self,
+                    prices: pd.DataFrame,
+                    short_range: Sequence[int],
+                    long_range: Sequence[int],
+                    max_workers: Optional[int] = None) -> List[Tuple[Tuple[int, int], float]]:
+        """
+        均线参数网格寻优（多进程）
+
+        收盘价只写入一次共享内存，各子进程直接映射为 NumPy 数组，
+        每组参数用编译后的回测内核计算；不修改本引擎的资金与持仓状态。
+
+        Args:
+            prices: 价格数据（需要包含close列）
+            short_range: 短期均线候选天数
+            long_range: 长期均线候选天数
+            max_workers: 进程数，默认 CPU 核数
+
+        Returns:
+            [((short_ma, long_ma), 总收益率%)]，按网格顺序排列，只包含 short < long 的组合
+        """
+        grid = [(s, l) for s in short_range for l in long_range if s < l]
+        if not grid:
+            return []
+
+        close = np.ascontiguousarray(prices['close'].to_numpy(dtype=np.float64))
+        workers = max_workers or os.cpu_count() or 1
+        chunk_size = math.ceil(len(grid) / workers)
+        chunks = [grid[i:i + chunk_size] for i in range(0, len(grid), chunk_size)]
+
+        shm = shared_memory.SharedMemory(create=True, size=close.nbytes)
+        try:
+            np.ndarray(close.shape, dtype=np.float64, buffer=shm.buf)[:] = close
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+                futures = [
+                    executor.submit(_grid_worker, shm.name, len(close), chunk,
+                                    self.initial_capital, self.commission)
+                    for chunk in chunks
+                ]
+                return [item for future in futures for item in future.result()]
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def _run_vector(self, signals: np.ndarray, prices: pd.DataFrame):
+        """
+        按预先算好的信号数组撮合交易
+
+        先用数组运算还原策略自身的持仓状态（最近一个非零信号为买入即视为多头），
+        只保留状态真正发生切换的买卖点，逐笔撮合的循环次数与交易次数成正比。
+        """
+        close = prices['close'].to_numpy(dtype=np.float64)
+        dates = prices['trade_date']
+        n = len(signals)
+
+        # state[i]：第 i 根K线收盘后策略是否处于多头
+        last_signal = np.maximum.accumulate(np.where(signals != 0, np.arange(n), -1))
+        state = np.where(last_signal >= 0, signals[np.maximum(last_signal, 0)] == BUY, self.position > 0)
+        prev_state = np.concatenate(([self.position > 0], state[:-1]))
+
+        effective_buys = (signals == BUY) & ~prev_state
+        effective_sells = (signals == SELL) & prev_state
+
+        for i in np.flatnonzero(effective_buys | effective_sells):
+            price = close[i]
+            if effective_buys[i]:
+                shares = np.int64(self.cash / price / 100) * 100
+                cost = shares * price * self._buy_factor
+
+                if shares > 0 and cost <= self.cash:
+                    self.position = shares
+                    self.cash -= cost
+
+                    self.trades.append({
+                        'date': dates.iat[i],
+                        'action': 'BUY',
+                        'shares': int(shares),
+                        'price': price,
+                        'cost': float(cost)
+                    })
+            elif self.position > 0:
+                # 买入因资金不足未成交时，对应的卖点直接跳过
+                revenue = self.position * price * self._sell_factor
+
+                self.trades.append({
+                    'date': dates.iat[i],
+                    'action': 'SELL',
+                    'shares': int(self.position),
+                    'price': price,
+                    'revenue': float(revenue)
+                })
+
+                self.cash += revenue
+                self.position = np.int64(0)
+
+    def _summary(self, prices: pd.DataFrame) -> Dict[str, Any]:
+        """汇总回测结果"""
         # 计算最终收益
         final_value = self.cash + self.position * prices.iloc[-1]['close']
         total_return = (final_value - self.initial_capital) / self.initial_capital * 100
         
         return {
             'initial_capital': self.initial_capital,
-            'final_value': final_value,
+            'final_value': float(final_value),
             'total_return': total_return,
             'trades': self.trades,
             'trade_count': len(self.trades)
@@ -360,8 +651,7 @@ if __name__ == "__main__":
     test_symbols = ["600519", "000001", "300750"]
     
     print("\n📊 均线交叉信号:")
-    for symbol in test_symbols:
-        signal = strategy.generate_signal(symbol)
+    for symbol, signal in strategy.scan(test_symbols).items():
         print(f"\n{symbol}:")
         print(f"  信号: {signal['signal'].value}")
         print(f"  价格: ¥{signal.get('price', 'N/A'):.2f}" if isinstance(signal.get('price'), float) else f"  价格: {signal.get('price', 'N/A')}")
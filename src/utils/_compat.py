@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Python 版本兼容封装
+dataclass(slots=True) 需要 Python 3.10+，低版本退化为普通 dataclass
+"""
+
+import sys
+
+# 用法: @dataclass(**DATACLASS_SLOTS)
+DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+__all__ = ['DATACLASS_SLOTS']
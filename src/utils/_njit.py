@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Numba 可选依赖封装
+未安装 numba 时 njit 退化为原样返回函数的装饰器，prange 退化为 range
+"""
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:  # numba 可选，未安装时调用方走 NumPy 实现
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """no-op 装饰器，兼容 @njit、@njit(...) 和 @njit(signature, ...) 三种写法"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+__all__ = ['njit', 'prange', 'NUMBA_AVAILABLE']
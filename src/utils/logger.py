@@ -6,54 +6,66 @@
 
 import logging
 import sys
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
-from datetime import datetime
-from loguru import logger
-import os
-
-# 添加项目根目录到路径
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
 # 项目日志目录
 LOG_DIR = Path(__file__).parent.parent.parent / "logs"
 LOG_DIR.mkdir(exist_ok=True)
 
+# 所有模块日志器的公共父日志器，处理器只挂在这里且只安装一次
+ROOT_LOGGER_NAME = "ai_stock_trader"
+_CONFIGURED = False
+
+
+def _configure_root() -> None:
+    """为公共父日志器安装控制台与文件处理器"""
+    global _CONFIGURED
+    if _CONFIGURED:
+        return
+
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    root.setLevel(logging.INFO)
+    root.propagate = False  # 不再向 logging 根日志器传递，避免重复输出
+
+    # 控制台输出
+    console = logging.StreamHandler(sys.stdout)
+    console.setLevel(logging.INFO)
+    console.setFormatter(logging.Formatter(
+        "%(asctime)s | %(levelname)-8s | %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
+    ))
+    root.addHandler(console)
+
+    # 文件输出：只记录 WARNING 及以上，回测中逐笔的 INFO 不落盘
+    file_handler = RotatingFileHandler(
+        LOG_DIR / "ai_stock_trader.log",
+        maxBytes=10 * 1024 * 1024,  # 单个文件 10MB
+        backupCount=7,
+        encoding="utf-8"
+    )
+    file_handler.setLevel(logging.WARNING)
+    file_handler.setFormatter(logging.Formatter(
+        "%(asctime)s | %(levelname)-8s | %(name)s | %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
+    ))
+    root.addHandler(file_handler)
+
+    _CONFIGURED = True
+
 
-def setup_logger(name: str = None) -> logger:
+def setup_logger(name: str = None) -> logging.Logger:
     """
     设置日志器
 
+    热路径中请使用 logger.info("%s ...", arg) 形式，级别未开启时不会格式化字符串
+
     Args:
         name: 模块名称
 
     Returns:
         配置好的logger对象
     """
-    # 移除默认处理器
-    logger.remove()
-
-    # 添加控制台输出
-    logger.add(
-        sys.stdout,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
-               "<level>{level: <8}</level> | "
-               "<cyan>{message}</cyan>",
-        level="INFO",
-        colorize=True
-    )
-
-    # 添加文件输出
-    log_file = LOG_DIR / f"{datetime.now().strftime('%Y-%m-%d')}.log"
-    logger.add(
-        log_file,
-        rotation="00:00",  # 每天0点切割
-        retention="7 days",  # 保留7天
-        encoding="utf-8",
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {message}",
-        level="DEBUG"
-    )
-
-    return logger
+    _configure_root()
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}" if name else ROOT_LOGGER_NAME)
 
 
 # 创建默认日志器
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+均线交叉计算内核
+整段信号用滚动求和（加入新值、减去移出窗口的旧值），每根K线工作量恒定；
+两条均线接近相等时改为对窗口从左到右重新求和再比较，与最后一根K线判断、
+NumPy 回退的求和方式相同，均线恰好相等时各路径的交叉判定一致；多只股票时按行并行
+"""
+
+import numpy as np
+
+from ._njit import njit, prange, NUMBA_AVAILABLE
+
+
+# 滚动均线之差小于该相对阈值时视为可能相等，改用逐项重新求和的均线判定；
+# 滚动和每满一圈重算一次，其舍入误差远小于该阈值
+_TIE_RTOL = 1e-9
+
+
+@njit(cache=True, inline='always')
+def _window_sum(close, end, window):
+    """close[end - window:end] 之和，从左到右逐项累加（不开 fastmath，保证求和顺序）"""
+    total = 0.0
+    for i in range(end - window, end):
+        total += close[i]
+    return total
+
+
+@njit(cache=True, inline='always')
+def _window_mean(close, end, window):
+    """close[end - window:end] 的均值，各路径比较均线相等时的统一口径"""
+    return _window_sum(close, end, window) / window
+
+
+@njit(cache=True)
+def _ma_cross_kernel(close, short, long):
+    """
+    逐根K线维护短/长两个窗口的滚动和，判断短均线是否上穿/下穿长均线
+
+    两条均线接近相等时按 _window_mean 重新求和后再比较。两条均线都有效之前
+    视为"不在上方"，close 须为不含 NaN 的连续 float64 数组。
+    """
+    n = close.shape[0]
+    out = np.zeros(n, dtype=np.int8)
+    sum_s = 0.0
+    sum_l = 0.0
+    prev_above = False
+    warmup = max(short, long) - 1
+
+    for i in range(n):
+        sum_s += close[i]
+        sum_l += close[i]
+        if i >= short:
+            sum_s -= close[i - short]
+        if i >= long:
+            sum_l -= close[i - long]
+        # 每满一圈重新求和，避免滚动加减的舍入误差随K线数累积
+        if (i + 1) % short == 0:
+            sum_s = _window_sum(close, i + 1, short)
+        if (i + 1) % long == 0:
+            sum_l = _window_sum(close, i + 1, long)
+
+        if i < warmup:
+            continue
+        ma_s = sum_s / short
+        ma_l = sum_l / long
+        if abs(ma_s - ma_l) <= _TIE_RTOL * (abs(ma_s) + abs(ma_l)):
+            ma_s = _window_mean(close, i + 1, short)
+            ma_l = _window_mean(close, i + 1, long)
+        above = ma_s > ma_l
+        if above and not prev_above:
+            out[i] = 1
+        elif prev_above and not above:
+            out[i] = -1
+        prev_above = above
+
+    return out
+
+
+def _rolling_mean_numpy(close: np.ndarray, window: int) -> np.ndarray:
+    """
+    各完整窗口的均值（长度 len(close) - window + 1）
+
+    按窗口内位置逐列累加（共 window 次向量加法），每个窗口的求和顺序与
+    _window_mean 相同，结果逐位一致
+    """
+    m = len(close) - window + 1
+    total = np.zeros(max(m, 0))
+    if m > 0:
+        for k in range(window):
+            total += close[k:k + m]
+    return total / window
+
+
+def _ma_cross_numpy(close: np.ndarray, short: int, long: int) -> np.ndarray:
+    """未安装 numba 时的 NumPy 实现"""
+    n = len(close)
+    above = np.zeros(n, dtype=np.int8)
+    warmup = max(short, long) - 1
+    if n > warmup:
+        ma_short = _rolling_mean_numpy(close, short)
+        ma_long = _rolling_mean_numpy(close, long)
+        above[warmup:] = ma_short[warmup - short + 1:] > ma_long[warmup - long + 1:]
+    return np.diff(above, prepend=np.int8(0)).astype(np.int8)
+
+
+def ma_cross_signal(close: np.ndarray, short: int, long: int) -> np.ndarray:
+    """
+    计算整段收盘价的均线交叉信号
+
+    Args:
+        close: 收盘价数组（连续 float64）
+        short: 短期均线天数
+        long: 长期均线天数
+
+    Returns:
+        int8 数组，1 金叉 / -1 死叉 / 0 无交叉
+    """
+    if NUMBA_AVAILABLE:
+        return _ma_cross_kernel(close, short, long)
+    return _ma_cross_numpy(close, short, long)
+
+
+@njit(cache=True)
+def ma_tail(close, short, long):
+    """
+    只用尾部窗口求最后两根K线的短/长均线
+
+    Returns:
+        (短均线最新值, 短均线前值, 长均线最新值, 长均线前值)，历史不足的为 NaN
+    """
+    n = close.shape[0]
+    out = np.full(4, np.nan)
+    for k, window in enumerate((short, short, long, long)):
+        end = n - (k % 2)  # 偶数位取最新一根，奇数位取前一根
+        if end >= window:
+            out[k] = _window_mean(close, end, window)
+    return out[0], out[1], out[2], out[3]
+
+
+def last_cross(close: np.ndarray, short: int, long: int):
+    """
+    只判断最后一根K线的交叉
+
+    Returns:
+        (信号, 短均线最新值, 长均线最新值)，信号 1 金叉 / -1 死叉 / 0 无交叉
+    """
+    ma_s, ma_s_prev, ma_l, ma_l_prev = ma_tail(close, short, long)
+    above = ma_s > ma_l
+    prev_above = ma_s_prev > ma_l_prev
+    cross = 1 if above and not prev_above else (-1 if prev_above and not above else 0)
+    return cross, ma_s, ma_l
+
+
+@njit(cache=True)
+def ma_cross_backtest(close, short, long, initial_capital, commission):
+    """
+    均线交叉策略的整段回测（与 BacktestEngine 向量化路径的撮合规则一致）
+
+    金叉且空仓时按整百股买入，死叉且持仓时全部卖出；前 long + 4 根K线不出信号。
+
+    Returns:
+        (期末总资产, 交易次数)
+    """
+    signals = _ma_cross_kernel(close, short, long)
+    cash = initial_capital
+    position = 0
+    trades = 0
+
+    for i in range(long + 4, close.shape[0]):
+        price = close[i]
+        if signals[i] == 1 and position == 0:
+            shares = int(cash / price / 100) * 100
+            cost = shares * price * (1 + commission)
+            if shares > 0 and cost <= cash:
+                position = shares
+                cash -= cost
+                trades += 1
+        elif signals[i] == -1 and position > 0:
+            cash += position * price * (1 - commission)
+            position = 0
+            trades += 1
+
+    return cash + position * close[-1], trades
+
+
+@njit(cache=True, parallel=True)
+def _batch_ma_cross_kernel(closes, lengths, short, long):
+    """多只股票并行计算最后一根K线的交叉信号，第 i 行只有最后 lengths[i] 列有效"""
+    n_symbols, n_bars = closes.shape
+    out = np.zeros(n_symbols, dtype=np.int8)
+    for i in prange(n_symbols):
+        if lengths[i] > 0:
+            out[i] = _ma_cross_kernel(closes[i, n_bars - lengths[i]:], short, long)[-1]
+    return out
+
+
+def batch_ma_cross(closes: np.ndarray, short: int, long: int,
+                   lengths: np.ndarray = None) -> np.ndarray:
+    """
+    批量计算多只股票最后一根K线的均线交叉信号
+
+    Args:
+        closes: 形状为 (N, T) 的收盘价矩阵，每行一只股票，历史不足的在前部补 NaN
+        short: 短期均线天数
+        long: 长期均线天数
+        lengths: 每行有效数据长度，缺省时按非 NaN 个数计算
+
+    Returns:
+        长度为 N 的 int8 数组，1 金叉 / -1 死叉 / 0 无交叉
+    """
+    closes = np.ascontiguousarray(closes, dtype=np.float64)
+    if lengths is None:
+        lengths = (~np.isnan(closes)).sum(axis=1)
+    lengths = np.ascontiguousarray(lengths, dtype=np.int64)
+
+    if NUMBA_AVAILABLE:
+        return _batch_ma_cross_kernel(closes, lengths, short, long)
+
+    n_bars = closes.shape[1]
+    out = np.zeros(closes.shape[0], dtype=np.int8)
+    for i, length in enumerate(lengths):
+        if length > 0:
+            out[i] = _ma_cross_numpy(closes[i, n_bars - length:], short, long)[-1]
+    return out
+
+
+__all__ = ['ma_cross_signal', 'batch_ma_cross', 'ma_tail', 'last_cross', 'ma_cross_backtest']
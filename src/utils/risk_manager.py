@@ -3,19 +3,22 @@
 """
 风险管理模块
 提供止损止盈、仓位控制、风险评估等功能
+
+在项目根目录以模块方式运行演示（模块使用包内相对导入，不能直接运行文件）：
+    python -m src.utils.risk_manager
 """
 
-import os
-import sys
+import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
 from dataclasses import dataclass, field
 from enum import Enum
 
-# 添加项目根目录到路径
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+import pandas as pd
 
-from utils.logger import setup_logger
+from .logger import setup_logger
+from ._compat import DATACLASS_SLOTS
 
 logger = setup_logger(__name__)
 
@@ -28,7 +31,7 @@ class RiskLevel(Enum):
     EXTREME = "extreme"
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class RiskMetrics:
     """风险指标"""
     # 收益指标
@@ -54,6 +57,15 @@ class RiskMetrics:
     concentration: float = 0.0  # 集中度
 
 
+@dataclass(**DATACLASS_SLOTS)
+class _Position:
+    """单只持仓"""
+    shares: int  # 持仓股数
+    cost_price: float  # 成本价
+    target_weight: float  # 目标仓位比例
+    add_time: Union[int, str]  # 建仓时间（纳秒时间戳，关闭快速计时时为字符串）
+
+
 class RiskManager:
     """风险管理器"""
     
@@ -84,8 +96,20 @@ class RiskManager:
         
         # 风险统计
         self.positions = {}  # 当前持仓
+        self._total_weight = 0.0  # 当前持仓目标仓位之和，随增减持仓维护
         self.trade_history = []  # 交易历史
         self.equity_curve = []  # 权益曲线
+        self._reset_equity_stats()
+
+        # 交易时间只记纳秒时间戳，format_trade_log 时再统一格式化
+        self._use_fast_time = True
+
+        # 持仓的列式镜像（SoA），供整本持仓一次性做止损止盈判断
+        self._sym_idx: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._cost = np.empty(8, dtype=np.float64)
+        self._shares = np.empty(8, dtype=np.int64)
+        self._target_weight = np.empty(8, dtype=np.float64)
         
     def calculate_position_size(self, 
                                symbol: str,
@@ -113,7 +137,7 @@ class RiskManager:
             risk_per_share = price - stop_loss_price
             
             if risk_per_share <= 0:
-                logger.warning(f"{symbol}: 止损价计算异常")
+                logger.warning("%s: 止损价计算异常", symbol)
                 return 0
             
             # 计算股数
@@ -123,11 +147,11 @@ class RiskManager:
             max_shares = int(available_capital * self.max_position_weight / price / 100) * 100
             shares = min(shares, max_shares)
             
-            logger.info(f"{symbol}: 建议买入 {shares} 股 (@ ¥{price:.2f})")
+            logger.info("%s: 建议买入 %d 股 (@ ¥%.2f)", symbol, shares, price)
             return shares
             
         except Exception as e:
-            logger.error(f"计算仓位失败: {e}")
+            logger.error("计算仓位失败: %s", e)
             return 0
     
     def check_stop_loss(self, symbol: str, current_price: float) -> bool:
@@ -145,11 +169,11 @@ class RiskManager:
             return False
             
         position = self.positions[symbol]
-        cost_price = position['cost_price']
+        cost_price = position.cost_price
         stop_loss_price = cost_price * (1 - self.stop_loss_ratio)
         
         if current_price <= stop_loss_price:
-            logger.warning(f"🚨 {symbol} 触发止损: 当前 ¥{current_price:.2f} < 止损 ¥{stop_loss_price:.2f}")
+            logger.warning("🚨 %s 触发止损: 当前 ¥%.2f < 止损 ¥%.2f", symbol, current_price, stop_loss_price)
             return True
             
         return False
@@ -169,15 +193,50 @@ class RiskManager:
             return False
             
         position = self.positions[symbol]
-        cost_price = position['cost_price']
+        cost_price = position.cost_price
         take_profit_price = cost_price * (1 + self.take_profit_ratio)
         
         if current_price >= take_profit_price:
-            logger.info(f"🎯 {symbol} 触发止盈: 当前 ¥{current_price:.2f} >= 止盈 ¥{take_profit_price:.2f}")
+            logger.info("🎯 %s 触发止盈: 当前 ¥%.2f >= 止盈 ¥%.2f", symbol, current_price, take_profit_price)
             return True
             
         return False
     
+    def batch_check_stops(self, prices: Dict[str, float]) -> Dict[str, str]:
+        """
+        整本持仓一次性检查止损与止盈
+
+        Args:
+            prices: {股票代码: 当前价格}，未给出价格的持仓不检查
+
+        Returns:
+            {股票代码: 'stop_loss' 或 'take_profit'}，只包含触发的持仓；
+            两者同时满足时（止损止盈比例为负等异常配置）按止损处理
+        """
+        held = [(i, prices[s]) for i, s in enumerate(self._symbols) if s in prices]
+        if not held:
+            return {}
+
+        idx = np.fromiter((i for i, _ in held), dtype=np.int64, count=len(held))
+        current = np.fromiter((p for _, p in held), dtype=np.float64, count=len(held))
+        cost = self._cost[idx]
+
+        stop_hit = current <= cost * (1 - self.stop_loss_ratio)
+        profit_hit = ~stop_hit & (current >= cost * (1 + self.take_profit_ratio))
+
+        triggered = {}
+        for k in np.flatnonzero(stop_hit):
+            symbol = self._symbols[idx[k]]
+            logger.warning("🚨 %s 触发止损: 当前 ¥%.2f < 止损 ¥%.2f",
+                           symbol, current[k], cost[k] * (1 - self.stop_loss_ratio))
+            triggered[symbol] = 'stop_loss'
+        for k in np.flatnonzero(profit_hit):
+            symbol = self._symbols[idx[k]]
+            logger.info("🎯 %s 触发止盈: 当前 ¥%.2f >= 止盈 ¥%.2f",
+                        symbol, current[k], cost[k] * (1 + self.take_profit_ratio))
+            triggered[symbol] = 'take_profit'
+        return triggered
+
     def can_open_position(self, symbol: str, proposed_weight: float) -> tuple:
         """
         检查是否可以开仓
@@ -206,7 +265,7 @@ class RiskManager:
     
     def _get_total_weight(self) -> float:
         """计算当前总仓位比例"""
-        return sum(pos['weight'] for pos in self.positions.values())
+        return self._total_weight
     
     def add_position(self, 
                     symbol: str, 
@@ -223,17 +282,35 @@ class RiskManager:
             target_weight: 目标仓位比例
         """
         if shares <= 0 or price <= 0:
-            logger.warning(f"无效的持仓参数: {symbol}")
+            logger.warning("无效的持仓参数: %s", symbol)
             return
         
-        self.positions[symbol] = {
-            'shares': shares,
-            'cost_price': price,
-            'target_weight': target_weight,
-            'add_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        
-        logger.info(f"➕ 添加持仓: {symbol} - {shares} 股 @ ¥{price:.2f}")
+        old = self.positions.get(symbol)
+        if old is not None:
+            self._total_weight -= old.target_weight
+        self._total_weight += target_weight
+        self.positions[symbol] = _Position(
+            shares=shares,
+            cost_price=price,
+            target_weight=target_weight,
+            add_time=self._now()
+        )
+        
+        idx = self._sym_idx.get(symbol)
+        if idx is None:
+            idx = len(self._symbols)
+            if idx == len(self._cost):
+                # 容量不足时翻倍扩容
+                self._cost = np.resize(self._cost, 2 * idx)
+                self._shares = np.resize(self._shares, 2 * idx)
+                self._target_weight = np.resize(self._target_weight, 2 * idx)
+            self._sym_idx[symbol] = idx
+            self._symbols.append(symbol)
+        self._cost[idx] = price
+        self._shares[idx] = shares
+        self._target_weight[idx] = target_weight
+        
+        logger.info("➕ 添加持仓: %s - %d 股 @ ¥%.2f", symbol, shares, price)
     
     def remove_position(self, symbol: str, sell_price: float):
         """
@@ -244,12 +321,12 @@ class RiskManager:
             sell_price: 卖出价格
         """
         if symbol not in self.positions:
-            logger.warning(f"不在持仓中: {symbol}")
+            logger.warning("不在持仓中: %s", symbol)
             return
         
         position = self.positions[symbol]
-        cost_price = position['cost_price']
-        shares = position['shares']
+        cost_price = position.cost_price
+        shares = position.shares
         
         profit_pct = (sell_price - cost_price) / cost_price * 100
         
@@ -260,14 +337,53 @@ class RiskManager:
             'buy_price': cost_price,
             'sell_price': sell_price,
             'profit_pct': profit_pct,
-            'time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            'time': self._now()
         })
         
-        # 删除持仓
+        # 删除持仓（列式镜像用最后一行填补空位）
         del self.positions[symbol]
-        
-        logger.info(f"➖ 清仓: {symbol} - 卖出 @ ¥{sell_price:.2f} (盈亏: {profit_pct:+.2f}%)")
+        # 清空时直接归零，避免浮点累加误差残留
+        self._total_weight = self._total_weight - position.target_weight if self.positions else 0.0
+        idx = self._sym_idx.pop(symbol)
+        last = len(self._symbols) - 1
+        if idx != last:
+            moved = self._symbols[last]
+            self._symbols[idx] = moved
+            self._sym_idx[moved] = idx
+            self._cost[idx] = self._cost[last]
+            self._shares[idx] = self._shares[last]
+            self._target_weight[idx] = self._target_weight[last]
+        self._symbols.pop()
+        
+        logger.info("➖ 清仓: %s - 卖出 @ ¥%.2f (盈亏: %+.2f%%)", symbol, sell_price, profit_pct)
     
+    def _now(self) -> Union[int, str]:
+        """当前时间：快速模式下为纳秒时间戳，否则为格式化字符串"""
+        if self._use_fast_time:
+            return time.time_ns()
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def format_trade_log(self, fmt: str = "%Y-%m-%d %H:%M:%S") -> List[Dict[str, Any]]:
+        """
+        输出可读的交易记录
+
+        Args:
+            fmt: 时间格式
+
+        Returns:
+            交易记录副本，纳秒时间戳统一转换为本地时间字符串
+        """
+        records = [dict(t) for t in self.trade_history]
+        stamps = [i for i, t in enumerate(records) if isinstance(t['time'], int)]
+        if stamps:
+            local_tz = datetime.now().astimezone().tzinfo
+            texts = (pd.to_datetime([records[i]['time'] for i in stamps], unit='ns', utc=True)
+                     .tz_convert(local_tz)
+                     .strftime(fmt))
+            for i, text in zip(stamps, texts):
+                records[i]['time'] = text
+        return records
+
     def calculate_risk_metrics(self, current_value: float) -> RiskMetrics:
         """
         计算风险指标
@@ -290,29 +406,84 @@ class RiskManager:
             # 计算现金比例
             if current_value > 0:
                 metrics.cash_ratio = (current_value - sum(
-                    p['shares'] * p['cost_price'] for p in self.positions.values()
+                    p.shares * p.cost_price for p in self.positions.values()
                 )) / current_value
             
             # 计算集中度（最大仓位）
             if current_value > 0:
-                weights = [p['target_weight'] for p in self.positions.values()]
+                weights = [p.target_weight for p in self.positions.values()]
                 metrics.concentration = max(weights) if weights else 0
         else:
             metrics.cash_ratio = 1.0
             metrics.concentration = 0
         
-        # 计算最大回撤（简化版）
+        # 权益曲线统计：最大回撤、波动率、夏普、索提诺（增量更新）
         if len(self.equity_curve) > 1:
-            equity = [e['value'] for e in self.equity_curve]
-            peak = max(equity)
-            drawdown = (peak - equity[-1]) / peak * 100 if peak > 0 else 0
-            metrics.max_drawdown = drawdown
+            self._update_equity_stats()
+            stats = self._equity_stats
+            metrics.max_drawdown = stats['max_drawdown'] * 100
+
+            n = stats['n_returns']
+            if n > 1:
+                mean = stats['sum_ret'] / n
+                var = max((stats['sum_sq'] - stats['sum_ret'] * mean) / (n - 1), 0.0)
+                std = var ** 0.5
+                downside = (stats['sum_down_sq'] / n) ** 0.5
+                metrics.volatility = std * np.sqrt(252) * 100
+                metrics.sharpe_ratio = mean / std * np.sqrt(252) if std > 0 else 0.0
+                metrics.sortino_ratio = mean / downside * np.sqrt(252) if downside > 0 else 0.0
         
         # 评估风险等级
         metrics.risk_level = self._assess_risk_level(metrics)
         
         return metrics
     
+    def _reset_equity_stats(self):
+        """清空权益曲线的增量统计"""
+        self._equity_stats = {
+            'count': 0,           # 已处理的权益点数
+            'last': 0.0,          # 最后一个权益值
+            'peak': -np.inf,      # 历史最高权益
+            'max_drawdown': 0.0,  # 最大回撤（比例）
+            'n_returns': 0,       # 收益率个数
+            'sum_ret': 0.0,       # 收益率之和
+            'sum_sq': 0.0,        # 收益率平方和
+            'sum_down_sq': 0.0,   # 负收益率平方和
+        }
+
+    def _update_equity_stats(self):
+        """
+        只处理上次之后新增的权益点：用 np.maximum.accumulate 接续历史峰值求回撤，
+        同一遍得到日收益率并累加均值/方差/下行方差所需的和
+        """
+        stats = self._equity_stats
+        if len(self.equity_curve) < stats['count']:
+            # 权益曲线被外部截断或替换，重新统计
+            self._reset_equity_stats()
+            stats = self._equity_stats
+
+        new = np.asarray([e['value'] for e in self.equity_curve[stats['count']:]], dtype=np.float64)
+        if len(new) == 0:
+            return
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            running_peak = np.maximum.accumulate(np.maximum(new, stats['peak']))
+            drawdown = np.where(running_peak > 0, (running_peak - new) / running_peak, 0.0)
+
+            values = new if stats['count'] == 0 else np.concatenate(([stats['last']], new))
+            prev = values[:-1]
+            returns = np.where(prev > 0, np.diff(values) / prev, 0.0)
+
+        stats['max_drawdown'] = max(stats['max_drawdown'], float(drawdown.max()))
+        stats['peak'] = float(running_peak[-1])
+        stats['last'] = float(new[-1])
+        stats['count'] = len(self.equity_curve)
+        stats['n_returns'] += len(returns)
+        stats['sum_ret'] += float(returns.sum())
+        stats['sum_sq'] += float(returns @ returns)
+        down = np.minimum(returns, 0.0)
+        stats['sum_down_sq'] += float(down @ down)
+
     def _assess_risk_level(self, metrics: RiskMetrics) -> RiskLevel:
         """评估风险等级"""
         if metrics.max_drawdown > 20:
@@ -338,14 +509,14 @@ class RiskManager:
         
         positions_info = []
         for symbol, position in self.positions.items():
-            market_value = position['shares'] * position['cost_price']
+            market_value = position.shares * position.cost_price
             positions_info.append({
                 'symbol': symbol,
-                'shares': position['shares'],
-                'cost': position['cost_price'],
+                'shares': position.shares,
+                'cost': position.cost_price,
                 'market_value': market_value,
                 'weight': market_value / current_value * 100 if current_value > 0 else 0,
-                'target_weight': position['target_weight']
+                'target_weight': position.target_weight
             })
         
         return {
@@ -416,21 +587,31 @@ class PositionSizer:
         Returns:
             建议买入股数字典
         """
-        # 按得分排序
-        sorted_symbols = sorted(symbols, key=lambda x: scores.get(x, 0), reverse=True)
-        
-        # 选择前N只
-        top_n = min(len(sorted_symbols), self.risk_manager.max_position_count)
-        selected = sorted_symbols[:top_n]
-        
+        # 选择得分最高的前N只：np.partition 只做部分划分，再对这N只排序
+        top_n = min(len(symbols), self.risk_manager.max_position_count)
+        if top_n <= 0:
+            return {}
+
+        score_arr = np.array([scores.get(s, 0) for s in symbols], dtype=np.float64)
+        # 第N名的得分作为门槛，与门槛同分的按原顺序补足，结果与稳定排序一致
+        threshold = -np.partition(-score_arr, top_n - 1)[top_n - 1]
+        above = np.flatnonzero(score_arr > threshold)
+        ties = np.flatnonzero(score_arr == threshold)[:top_n - len(above)]
+        idx = np.concatenate((above, ties))
+        idx = idx[np.argsort(-score_arr[idx], kind='stable')]
+        selected_scores = score_arr[idx]
+
         # 计算权重（按得分加权）
-        total_score = sum(scores.get(s, 0) for s in selected)
+        total_score = selected_scores.sum()
+        if total_score > 0:
+            weights = selected_scores / total_score
+        else:
+            weights = np.full(top_n, 1 / top_n)
         allocations = {}
-        
-        for symbol in selected:
-            score = scores.get(symbol, 0)
-            weight = score / total_score if total_score > 0 else 1 / len(selected)
-            
+
+        for i, weight in zip(idx.tolist(), weights.tolist()):
+            symbol = symbols[i]
+
             # 计算买入股数
             allocation_capital = self.total_capital * weight
             shares = self.risk_manager.calculate_position_size(
@@ -3,23 +3,309 @@
 """
 技术分析工具模块
 提供各种技术指标计算和K线形态识别
+
+在项目根目录以模块方式运行演示（模块使用包内相对导入，不能直接运行文件）：
+    python -m src.utils.technical_analysis
 """
 
+import math
+from bisect import bisect_right
+from functools import lru_cache
+
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
 
-import sys
-import os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from .logger import setup_logger
+from ._njit import njit, prange, NUMBA_AVAILABLE
+from ._compat import DATACLASS_SLOTS
 
-from utils.logger import setup_logger
+try:
+    from scipy.signal import lfilter, lfilter_zi
+    SCIPY_AVAILABLE = True
+except ImportError:  # scipy 可选，未安装 numba 时用于 EMA/MACD
+    SCIPY_AVAILABLE = False
 
 logger = setup_logger(__name__)
 
 
+@njit(cache=True, fastmath=True)
+def _ewma_last(x, alpha):
+    """指数移动平均的最新值（与 pandas ewm(adjust=False) 一致，以首个值为初值）"""
+    s = x[0]
+    for i in range(1, x.shape[0]):
+        s = alpha * x[i] + (1 - alpha) * s
+    return s
+
+
+@njit(cache=True, fastmath=True)
+def _macd_last(x, alpha_fast, alpha_slow, alpha_signal):
+    """一次遍历同时递推快线、慢线和信号线，返回 (MACD, 信号线, 柱) 的最新值"""
+    fast = x[0]
+    slow = x[0]
+    signal = 0.0  # 首根K线的 MACD 为 0，信号线以它为初值
+    for i in range(1, x.shape[0]):
+        fast = alpha_fast * x[i] + (1 - alpha_fast) * fast
+        slow = alpha_slow * x[i] + (1 - alpha_slow) * slow
+        signal = alpha_signal * (fast - slow) + (1 - alpha_signal) * signal
+    macd = fast - slow
+    return macd, signal, macd - signal
+
+
+def _ewma_lfilter(x: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    用 IIR 滤波整段计算 EMA（未安装 numba 时使用）
+
+    y[t] = alpha * x[t] + (1 - alpha) * y[t-1]；初始状态按 x[0] 的稳态设置，
+    使 y[0] = x[0]，与 pandas ewm(adjust=False) 一致。
+    """
+    b = [alpha]
+    a = [1.0, alpha - 1.0]
+    y, _ = lfilter(b, a, x, zi=lfilter_zi(b, a) * x[0])
+    return y
+
+
+def _macd_lfilter(x: np.ndarray, alpha_fast: float, alpha_slow: float, alpha_signal: float):
+    """_macd_last 的 scipy 实现"""
+    macd_line = _ewma_lfilter(x, alpha_fast) - _ewma_lfilter(x, alpha_slow)
+    macd = float(macd_line[-1])
+    signal = float(_ewma_lfilter(macd_line, alpha_signal)[-1])
+    return macd, signal, macd - signal
+
+
+@njit(cache=True)
+def _rsi_multi(close, periods):
+    """
+    多周期 Wilder RSI，共用一次差分
+
+    每个周期以前 p 个涨跌幅的均值为初值，之后按 avg = (avg * (p - 1) + x) / p 递推；
+    数据不足或无涨跌时为 50，只涨不跌时为 100。
+    """
+    n = close.shape[0] - 1
+    delta = np.empty(max(n, 0))
+    for i in range(n):
+        delta[i] = close[i + 1] - close[i]
+
+    out = np.full(periods.shape[0], 50.0)
+    for k in range(periods.shape[0]):
+        p = periods[k]
+        if n < p:
+            continue
+        avg_gain = 0.0
+        avg_loss = 0.0
+        for i in range(p):
+            avg_gain += max(delta[i], 0.0)
+            avg_loss += max(-delta[i], 0.0)
+        avg_gain /= p
+        avg_loss /= p
+        for i in range(p, n):
+            avg_gain = (avg_gain * (p - 1) + max(delta[i], 0.0)) / p
+            avg_loss = (avg_loss * (p - 1) + max(-delta[i], 0.0)) / p
+
+        if avg_loss > 0:
+            out[k] = 100 - 100 / (1 + avg_gain / avg_loss)
+        elif avg_gain > 0:
+            out[k] = 100.0
+    return out
+
+
+def _rsi_multi_numpy(close: np.ndarray, periods: np.ndarray) -> np.ndarray:
+    """
+    未安装 numba 时的 NumPy 实现
+
+    涨跌用 np.maximum 一次拆分；Wilder 递推 avg = avg * (1 - a) + x * a（a = 1 / p）
+    展开后是初值与之后各涨跌幅的加权和，权重按 (1 - a) 的幂次衰减，一次点积求得。
+    """
+    delta = np.diff(close)
+    gain = np.maximum(delta, 0.0)
+    loss = np.maximum(-delta, 0.0)
+    n = delta.size
+
+    out = np.full(len(periods), 50.0)
+    for k, p in enumerate(periods):
+        if n < p:
+            continue
+        alpha = 1.0 / p
+        decay = (1 - alpha) ** np.arange(n - p - 1, -1, -1)
+        avg_gain = gain[:p].mean() * (1 - alpha) ** (n - p) + alpha * (gain[p:] @ decay)
+        avg_loss = loss[:p].mean() * (1 - alpha) ** (n - p) + alpha * (loss[p:] @ decay)
+
+        if avg_loss > 0:
+            out[k] = 100 - 100 / (1 + avg_gain / avg_loss)
+        elif avg_gain > 0:
+            out[k] = 100.0
+    return out
+
+
+# _compute_all / batch_calculate 输出的各列，与 TechnicalIndicators 的字段同名
+BATCH_FIELDS = (
+    'ma5', 'ma10', 'ma20', 'ma60', 'ma120',
+    'macd', 'signal', 'histogram',
+    'rsi6', 'rsi12', 'rsi24',
+    'bollinger_upper', 'bollinger_middle', 'bollinger_lower', 'bollinger_width',
+    'atr14', 'atr10',
+    'volume_ma5', 'volume_ma10', 'volume_ma20', 'volume_ratio',
+)
+_N_FIELDS = len(BATCH_FIELDS)
+
+
+@njit(inline='always', fastmath=True, boundscheck=False)
+def _compute_all_body(close, high, low, vol, n):
+    """
+    一次调用算出全部指标，按 BATCH_FIELDS 的顺序返回 float64 数组
+
+    n 为K线根数（调用方保证至少60根）；无法计算的值（如不足120根时的 MA120）为 NaN。
+    在 numba IR 层内联到调用方，n 为编译期常量时各循环边界随之固定。
+    """
+    out = np.full(_N_FIELDS, np.nan)
+
+    # 1. 均线：对最后120根做一次前缀和，各周期一次相减
+    m = min(n, 120)
+    csum = np.zeros(m + 1)
+    vsum = np.zeros(m + 1)
+    for i in range(m):
+        csum[i + 1] = csum[i] + close[n - m + i]
+        vsum[i + 1] = vsum[i] + vol[n - m + i]
+    ma_periods = (5, 10, 20, 60, 120)
+    for k in range(5):
+        p = ma_periods[k]
+        if p <= m:
+            out[k] = (csum[m] - csum[m - p]) / p
+    for k in range(3):
+        p = ma_periods[k]
+        out[17 + k] = (vsum[m] - vsum[m - p]) / p
+    out[20] = vol[n - 1] / out[19] if out[19] > 0 else 1.0
+
+    # 2. MACD：快线、慢线、信号线一次递推
+    out[5], out[6], out[7] = _macd_last(close, 2 / 13, 2 / 27, 2 / 10)
+
+    # 3. RSI：一次遍历差分，同时递推三个周期的 Wilder 平均涨跌
+    rsi_periods = (6, 12, 24)
+    avg_gain = np.zeros(3)
+    avg_loss = np.zeros(3)
+    for i in range(1, n):
+        d = close[i] - close[i - 1]
+        gain = max(d, 0.0)
+        loss = max(-d, 0.0)
+        for k in range(3):
+            p = rsi_periods[k]
+            if i <= p:
+                avg_gain[k] += gain
+                avg_loss[k] += loss
+                if i == p:
+                    avg_gain[k] /= p
+                    avg_loss[k] /= p
+            else:
+                avg_gain[k] = (avg_gain[k] * (p - 1) + gain) / p
+                avg_loss[k] = (avg_loss[k] * (p - 1) + loss) / p
+    for k in range(3):
+        if n - 1 < rsi_periods[k] or (avg_loss[k] == 0 and avg_gain[k] == 0):
+            out[8 + k] = 50.0
+        elif avg_loss[k] == 0:
+            out[8 + k] = 100.0
+        else:
+            out[8 + k] = 100 - 100 / (1 + avg_gain[k] / avg_loss[k])
+
+    # 4. 布林带：中轨即 MA20，标准差用 Welford 算法（总体标准差）
+    mean = 0.0
+    m2 = 0.0
+    for k in range(20):
+        x = close[n - 20 + k]
+        delta = x - mean
+        mean += delta / (k + 1)
+        m2 += delta * (x - mean)
+    sd = (m2 / 20) ** 0.5
+    middle = out[2]
+    out[11] = middle + 2 * sd
+    out[12] = middle
+    out[13] = middle - 2 * sd
+    out[14] = 4 * sd / middle * 100 if middle > 0 else 0.0
+
+    # 5. ATR：最后14根真实波幅一次遍历，ATR10 取其中最后10根
+    sum14 = 0.0
+    sum10 = 0.0
+    for i in range(n - 14, n):
+        tr = max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        sum14 += tr
+        if i >= n - 10:
+            sum10 += tr
+    out[15] = sum14 / 14
+    out[16] = sum10 / 10
+
+    return out
+
+
+@njit(cache=True, fastmath=True, boundscheck=False)
+def _compute_all(close, high, low, vol):
+    """任意K线根数的通用内核"""
+    return _compute_all_body(close, high, low, vol, close.shape[0])
+
+
+# 生成专用内核的K线根数；其余长度走通用内核，避免历史逐日增长时每个长度各编译一次
+_SPECIALIZED_LENGTHS = (60, 120)
+
+
+@lru_cache(maxsize=8)
+def _make_kernel(n: int):
+    """
+    为固定K线根数生成专用内核
+
+    n 以闭包常量的形式进入编译，循环边界成为常量，LLVM 可以展开布林带/ATR 等
+    定长窗口的循环。首次遇到某个长度时编译，之后命中缓存；调用方把数据截取到
+    固定长度（如最近120根）可以稳定命中。
+    """
+    if not NUMBA_AVAILABLE:
+        return _compute_all
+
+    @njit(fastmath=True, boundscheck=False)
+    def kernel(close, high, low, vol):
+        return _compute_all_body(close, high, low, vol, n)
+
+    return kernel
+
+
+@njit(cache=True, parallel=True, nogil=True)
+def _batch_kernel(closes, highs, lows, vols, lengths, out):
+    """按行并行计算指标，第 i 行只有最后 lengths[i] 列有效，不足60根的行保持 NaN"""
+    n_bars = closes.shape[1]
+    for i in prange(closes.shape[0]):
+        if lengths[i] < 60:
+            continue
+        start = n_bars - lengths[i]
+        out[i] = _compute_all(closes[i, start:], highs[i, start:], lows[i, start:], vols[i, start:])
+
+
+def batch_calculate(closes: np.ndarray, highs: np.ndarray, lows: np.ndarray,
+                    vols: np.ndarray, lengths: np.ndarray = None) -> np.ndarray:
+    """
+    多只股票批量计算技术指标（按股票并行）
+
+    Args:
+        closes: 形状为 (N, T) 的收盘价矩阵，每行一只股票，历史不足的在前部补 NaN
+        highs: 最高价矩阵，形状同上
+        lows: 最低价矩阵，形状同上
+        vols: 成交量矩阵，形状同上
+        lengths: 每行有效数据长度，缺省时按收盘价非 NaN 个数计算
+
+    Returns:
+        形状为 (N, len(BATCH_FIELDS)) 的 float64 矩阵，列顺序见 BATCH_FIELDS；
+        不足60根K线的行及无法计算的值为 NaN
+    """
+    closes = np.ascontiguousarray(closes, dtype=np.float64)
+    highs = np.ascontiguousarray(highs, dtype=np.float64)
+    lows = np.ascontiguousarray(lows, dtype=np.float64)
+    vols = np.ascontiguousarray(vols, dtype=np.float64)
+    if lengths is None:
+        lengths = (~np.isnan(closes)).sum(axis=1)
+    lengths = np.ascontiguousarray(lengths, dtype=np.int64)
+
+    out = np.full((closes.shape[0], len(BATCH_FIELDS)), np.nan)
+    _batch_kernel(closes, highs, lows, vols, lengths, out)
+    return out
+
+
 class TrendType(Enum):
     """趋势类型"""
     UPTREND = "uptrend"
@@ -37,7 +323,7 @@ class SignalType(Enum):
     STRONG_SELL = "strong_sell"
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class TechnicalIndicators:
     """技术指标数据结构"""
     # 移动平均线
@@ -78,6 +364,9 @@ class TechnicalIndicators:
     volume_ma20: float = None
     volume_ratio: float = None
 
+    # 最新收盘价
+    last_close: float = None
+
     # 趋势
     trend: TrendType = TrendType.UNKNOWN
 
@@ -85,80 +374,336 @@ class TechnicalIndicators:
     score: int = 50
 
 
+# 综合评分 -> 交易信号：分数落在相邻分界之间即对应表中一项（左闭右开）
+_SIGNAL_BREAKS = (30, 45, 65, 80)
+_SIGNAL_TABLE = (
+    (SignalType.STRONG_SELL, "技术面全面走弱"),
+    (SignalType.SELL, "技术面偏弱"),
+    (SignalType.HOLD, "技术面中性"),
+    (SignalType.BUY, "技术面偏强"),
+    (SignalType.STRONG_BUY, "技术面全面向好"),
+)
+
+# RSI12 分区加减分：<30 超卖 +5，[40, 60] 中性 +5，>70 超买 -5，其余 0；
+# 60、70 两个分界取其后一个浮点数，使 60 归入中性区、70 不算超买
+_RSI_BREAKS = (30, 40, math.nextafter(60, math.inf), math.nextafter(70, math.inf))
+_RSI_SCORE = (5, 0, 5, 0, -5)
+
+
+class TrendCode:
+    """批量结果中趋势的整数编码（存为 int8），与 TrendType 一一对应"""
+    UNKNOWN = 0
+    UPTREND = 1
+    DOWNTREND = 2
+    SIDEWAYS = 3
+
+
+class SignalCode:
+    """批量结果中交易信号的整数编码（存为 int8），数值越大越看多"""
+    STRONG_SELL = -2
+    SELL = -1
+    HOLD = 0
+    BUY = 1
+    STRONG_BUY = 2
+
+
+# 编码 -> 枚举，下标即趋势编码
+_TREND_BY_CODE = (TrendType.UNKNOWN, TrendType.UPTREND, TrendType.DOWNTREND, TrendType.SIDEWAYS)
+# 与 _SIGNAL_TABLE 逐项对应的信号编码
+_SIGNAL_CODE_TABLE = np.array([SignalCode.STRONG_SELL, SignalCode.SELL, SignalCode.HOLD,
+                               SignalCode.BUY, SignalCode.STRONG_BUY], dtype=np.int8)
+
+
+def _judge_trend_batch(ma5: np.ndarray, ma20: np.ndarray, ma60: np.ndarray) -> np.ndarray:
+    """_judge_trend 的向量化版本，返回 int8 趋势编码"""
+    up = (ma5 > ma20) & (ma20 > ma60) & (ma5 > ma20 * 1.02)
+    down = (ma5 < ma20) & (ma20 < ma60) & (ma5 < ma20 * 0.98)
+    trend = np.where(up, TrendCode.UPTREND,
+                     np.where(down, TrendCode.DOWNTREND, TrendCode.SIDEWAYS)).astype(np.int8)
+    trend[np.isnan(ma5) | np.isnan(ma20)] = TrendCode.UNKNOWN
+    return trend
+
+
+def _score_batch(trend: np.ndarray, histogram: np.ndarray, rsi12: np.ndarray) -> np.ndarray:
+    """_calc_comprehensive_score 的向量化版本，返回 int16 评分"""
+    score = np.full(trend.shape, 50, dtype=np.int16)
+    score += np.where(trend == TrendCode.UPTREND, 20, 0).astype(np.int16)
+    score -= np.where(trend == TrendCode.DOWNTREND, 20, 0).astype(np.int16)
+    score += np.where(histogram > 0, 10, np.where(histogram < 0, -10, 0)).astype(np.int16)
+    rsi_delta = np.asarray(_RSI_SCORE, dtype=np.int16)[np.searchsorted(_RSI_BREAKS, rsi12, side='right')]
+    score += np.where(np.isnan(rsi12), 0, rsi_delta).astype(np.int16)
+    np.clip(score, 0, 100, out=score)
+    return score
+
+
+# 计算指标所需的列；成交量列为 'vol' 或 'volume' 之一
+_REQUIRED_COLUMNS = frozenset(('high', 'low', 'close'))
+_VOLUME_COLUMNS = frozenset(('vol', 'volume'))
+
+
+@dataclass
+class BarArray:
+    """K线数组：列名别名与 float64 转换在 from_df 中一次完成，供指标计算直接使用"""
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame) -> 'BarArray':
+        """
+        由K线DataFrame构造
+
+        成交量列可为 'vol' 或 'volume'；缺少开盘价时以收盘价代替（指标计算不使用开盘价）。
+        """
+        def column(name: str) -> np.ndarray:
+            # 按行追加的K线列本身通常已是连续 float64 缓冲区，此时不会复制
+            return np.ascontiguousarray(df[name].to_numpy(dtype=np.float64, copy=False))
+
+        close = column('close')
+        return cls(
+            open=column('open') if 'open' in df.columns else close,
+            high=column('high'),
+            low=column('low'),
+            close=close,
+            volume=column('vol' if 'vol' in df.columns else 'volume'),
+        )
+
+    def __len__(self) -> int:
+        return self.close.size
+
+
+@dataclass(**DATACLASS_SLOTS)
+class IndicatorsBatch:
+    """
+    多只股票的技术指标（列式存储）
+
+    每个指标一列 float64 数组，第 i 个元素对应 symbols[i]，无法计算的为 NaN；
+    趋势为 int8 编码，评分为 int16，可直接做向量化筛选与排序。
+    """
+    symbols: List[str]
+    ma5: np.ndarray
+    ma10: np.ndarray
+    ma20: np.ndarray
+    ma60: np.ndarray
+    ma120: np.ndarray
+    macd: np.ndarray
+    signal: np.ndarray
+    histogram: np.ndarray
+    rsi6: np.ndarray
+    rsi12: np.ndarray
+    rsi24: np.ndarray
+    bollinger_upper: np.ndarray
+    bollinger_middle: np.ndarray
+    bollinger_lower: np.ndarray
+    bollinger_width: np.ndarray
+    atr14: np.ndarray
+    atr10: np.ndarray
+    volume_ma5: np.ndarray
+    volume_ma10: np.ndarray
+    volume_ma20: np.ndarray
+    volume_ratio: np.ndarray
+    last_close: np.ndarray
+    trend: np.ndarray
+    score: np.ndarray
+
+    @classmethod
+    def from_values(cls, symbols: List[str], values: np.ndarray,
+                    last_close: np.ndarray = None) -> 'IndicatorsBatch':
+        """
+        由 batch_calculate 的结果矩阵构造，并向量化计算趋势与评分
+
+        Args:
+            symbols: 股票代码，与矩阵各行对应
+            values: 形状为 (N, len(BATCH_FIELDS)) 的指标矩阵
+            last_close: 各股票最新收盘价，缺省时为 NaN
+        """
+        columns = dict(zip(BATCH_FIELDS, np.ascontiguousarray(values.T)))
+        if last_close is None:
+            last_close = np.full(len(symbols), np.nan)
+        trend = _judge_trend_batch(columns['ma5'], columns['ma20'], columns['ma60'])
+        score = _score_batch(trend, columns['histogram'], columns['rsi12'])
+        return cls(symbols=list(symbols), last_close=np.asarray(last_close, dtype=np.float64),
+                   trend=trend, score=score, **columns)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def to_dataclass(self, i: int) -> TechnicalIndicators:
+        """
+        取出第 i 只股票的指标，转换为 TechnicalIndicators（NaN 记为 None）
+
+        只在需要单只股票明细时调用；数据不足（ma5 为 NaN）的返回空指标。
+        """
+        if math.isnan(self.ma5[i]):
+            return TechnicalIndicators()
+        indicators = TechnicalIndicators()
+        for name in BATCH_FIELDS:
+            value = float(getattr(self, name)[i])
+            setattr(indicators, name, None if math.isnan(value) else value)
+        last_close = float(self.last_close[i])
+        indicators.last_close = None if math.isnan(last_close) else last_close
+        indicators.trend = _TREND_BY_CODE[self.trend[i]]
+        indicators.score = int(self.score[i])
+        return indicators
+
+
 class TechnicalAnalyzer:
     """技术分析器"""
 
     def __init__(self):
         pass
 
-    def calculate_indicators(self, df: pd.DataFrame) -> TechnicalIndicators:
+    def calculate_indicators(self, data: Union[pd.DataFrame, BarArray]) -> TechnicalIndicators:
         """
         计算所有技术指标
 
         Args:
-            df: 包含 'open', 'high', 'low', 'close', 'vol' 列的DataFrame
+            data: 包含 'open', 'high', 'low', 'close', 'vol' 列的DataFrame，
+                  或已转换好的 BarArray（跳过列检查与类型转换）
 
         Returns:
             TechnicalIndicators 对象
         """
+        if isinstance(data, BarArray):
+            if len(data) < 60:
+                logger.warning("数据不足，无法计算技术指标")
+                return TechnicalIndicators()
+            return self._calculate(data)
+
+        # 入口处一次性校验，计算过程中的异常直接抛给调用方
+        df = data
         if df is None or df.empty or len(df) < 60:
             logger.warning("数据不足，无法计算技术指标")
             return TechnicalIndicators()
+        if not _REQUIRED_COLUMNS.issubset(df.columns) or not _VOLUME_COLUMNS & set(df.columns):
+            logger.warning("K线数据缺少必要的列，无法计算技术指标")
+            return TechnicalIndicators()
 
-        try:
-            close = df['close'].astype(float)
-            high = df['high'].astype(float)
-            low = df['low'].astype(float)
-            volume = df['vol'].astype(float) if 'vol' in df.columns else df['volume'].astype(float)
-
-            indicators = TechnicalIndicators()
-
-            # 移动平均线
-            indicators.ma5 = self._sma(close, 5)
-            indicators.ma10 = self._sma(close, 10)
-            indicators.ma20 = self._sma(close, 20)
-            indicators.ma60 = self._sma(close, 60)
-            indicators.ma120 = self._sma(close, 120) if len(df) >= 120 else None
-
-            # MACD
-            macd_line, signal_line, hist = self._macd(close)
-            indicators.macd = macd_line.iloc[-1] if len(macd_line) > 0 else None
-            indicators.signal = signal_line.iloc[-1] if len(signal_line) > 0 else None
-            indicators.histogram = hist.iloc[-1] if len(hist) > 0 else None
-
-            # RSI
-            indicators.rsi6 = self._rsi(close, 6)
-            indicators.rsi12 = self._rsi(close, 12)
-            indicators.rsi24 = self._rsi(close, 24)
-
-            # 布林带
-            upper, middle, lower = self._bollinger_bands(close)
-            indicators.bollinger_upper = upper.iloc[-1]
-            indicators.bollinger_middle = middle.iloc[-1]
-            indicators.bollinger_lower = lower.iloc[-1]
-            indicators.bollinger_width = (upper.iloc[-1] - lower.iloc[-1]) / middle.iloc[-1] * 100
-
-            # ATR
-            indicators.atr14 = self._atr(high, low, close, 14)
-            indicators.atr10 = self._atr(high, low, close, 10)
-
-            # 成交量指标
-            indicators.volume_ma5 = self._sma(volume, 5)
-            indicators.volume_ma10 = self._sma(volume, 10)
-            indicators.volume_ma20 = self._sma(volume, 20)
-            indicators.volume_ratio = volume.iloc[-1] / indicators.volume_ma20 if indicators.volume_ma20 > 0 else 1.0
-
-            # 判断趋势
-            indicators.trend = self._judge_trend(indicators)
+        return self._calculate(BarArray.from_df(df))
 
-            # 综合评分
+    def _calculate(self, bars: BarArray) -> TechnicalIndicators:
+        """由K线数组计算全部指标（调用方保证至少60根K线）"""
+        if NUMBA_AVAILABLE:
+            # 全部指标在一个编译内核中算完，这里只负责拆包
+            n = len(bars)
+            kernel = _make_kernel(n) if n in _SPECIALIZED_LENGTHS else _compute_all
+            indicators = self._from_values(kernel(bars.close, bars.high, bars.low, bars.volume))
+            indicators.last_close = float(bars.close[-1])
+            indicators.trend = self._judge_trend(indicators)
             indicators.score = self._calc_comprehensive_score(indicators)
-
             return indicators
 
-        except Exception as e:
-            logger.error(f"计算技术指标失败: {e}")
-            return TechnicalIndicators()
+        close = bars.close
+        high = bars.high
+        low = bars.low
+        volume = bars.volume
+
+        indicators = TechnicalIndicators()
+        indicators.last_close = float(close[-1])
+
+        # 移动平均线（共用一次前缀和）
+        (indicators.ma5, indicators.ma10, indicators.ma20,
+         indicators.ma60, indicators.ma120) = self._sma_all(close, (5, 10, 20, 60, 120))
+
+        # MACD
+        indicators.macd, indicators.signal, indicators.histogram = self._macd(close)
+
+        # RSI（三个周期一次遍历）
+        indicators.rsi6, indicators.rsi12, indicators.rsi24 = self._rsi_all(close, (6, 12, 24))
+
+        # 布林带
+        # 布林带中轨即 MA20，只需再求标准差
+        upper, middle, lower = self._bollinger_bands(close, middle=indicators.ma20)
+        indicators.bollinger_upper = upper
+        indicators.bollinger_middle = middle
+        indicators.bollinger_lower = lower
+        indicators.bollinger_width = (upper - lower) / middle * 100 if middle > 0 else 0.0
+
+        # ATR（两个周期共用同一段真实波幅）
+        tr = self._true_range(high, low, close)
+        indicators.atr14 = self._atr(tr, 14)
+        indicators.atr10 = self._atr(tr, 10)
+
+        # 成交量指标
+        indicators.volume_ma5, indicators.volume_ma10, indicators.volume_ma20 = self._sma_all(volume, (5, 10, 20))
+        indicators.volume_ratio = float(volume[-1]) / indicators.volume_ma20 if indicators.volume_ma20 > 0 else 1.0
+
+        # 判断趋势
+        indicators.trend = self._judge_trend(indicators)
+
+        # 综合评分
+        indicators.score = self._calc_comprehensive_score(indicators)
+
+        return indicators
+
+    def calculate_batch(self, data: Dict[str, pd.DataFrame]) -> IndicatorsBatch:
+        """
+        批量计算多只股票的技术指标，结果按列存储
+
+        各股票的K线右对齐拼成 (N, T) 矩阵后一次并行计算；未安装 numba 时
+        逐只调用 calculate_indicators 再拼成矩阵。
+
+        Args:
+            data: {股票代码: K线DataFrame}
+
+        Returns:
+            IndicatorsBatch，数据不足的股票各指标为 NaN
+        """
+        symbols = list(data)
+        if NUMBA_AVAILABLE:
+            stacked = self._stack_bars(data)
+            values = batch_calculate(*stacked)
+            # K线右对齐，最后一列即各股票最新收盘价（无数据的为 NaN）
+            last_close = stacked[0][:, -1] if stacked[0].size else np.full(len(symbols), np.nan)
+        else:
+            values = np.full((len(symbols), len(BATCH_FIELDS)), np.nan)
+            last_close = np.full(len(symbols), np.nan)
+            for i, symbol in enumerate(symbols):
+                indicators = self.calculate_indicators(data[symbol])
+                if indicators.ma5 is not None:
+                    values[i] = [np.nan if getattr(indicators, name) is None else getattr(indicators, name)
+                                 for name in BATCH_FIELDS]
+                    last_close[i] = indicators.last_close
+        return IndicatorsBatch.from_values(symbols, values, last_close)
+
+    def calculate_indicators_batch(self, data: Dict[str, pd.DataFrame]) -> Dict[str, TechnicalIndicators]:
+        """
+        批量计算多只股票的技术指标
+
+        Args:
+            data: {股票代码: K线DataFrame}
+
+        Returns:
+            {股票代码: TechnicalIndicators}，数据不足的为空指标
+        """
+        if not NUMBA_AVAILABLE:
+            return {symbol: self.calculate_indicators(df) for symbol, df in data.items()}
+
+        batch = self.calculate_batch(data)
+        return {symbol: batch.to_dataclass(i) for i, symbol in enumerate(batch.symbols)}
+
+    def _stack_bars(self, data: Dict[str, pd.DataFrame]):
+        """把各股票K线右对齐拼成 (N, T) 矩阵，历史不足的在前部补 NaN"""
+        symbols = list(data)
+        lengths = np.array([0 if data[s] is None else len(data[s]) for s in symbols], dtype=np.int64)
+        n_bars = int(lengths.max()) if len(symbols) else 0
+        matrices = {col: np.full((len(symbols), n_bars), np.nan) for col in ('close', 'high', 'low', 'volume')}
+        for i, symbol in enumerate(symbols):
+            if lengths[i] == 0:
+                continue
+            bars = BarArray.from_df(data[symbol])
+            for col, matrix in matrices.items():
+                matrix[i, n_bars - lengths[i]:] = getattr(bars, col)
+        return matrices['close'], matrices['high'], matrices['low'], matrices['volume'], lengths
+
+    def _from_values(self, values: np.ndarray) -> TechnicalIndicators:
+        """按 BATCH_FIELDS 把一行指标值填入 TechnicalIndicators，NaN 记为 None"""
+        indicators = TechnicalIndicators()
+        for name, value in zip(BATCH_FIELDS, values.tolist()):
+            setattr(indicators, name, None if math.isnan(value) else value)
+        return indicators
 
     def generate_signal(self, df: pd.DataFrame) -> Dict[str, Any]:
         """
@@ -181,7 +726,7 @@ class TechnicalAnalyzer:
         # 1. 均线信号
         if indicators.ma5 > indicators.ma20 > indicators.ma60:
             signals.append("MA多头排列")
-            if df['close'].iloc[-1] > indicators.ma5:
+            if indicators.last_close > indicators.ma5:
                 signals.append("价格在MA5上方")
         elif indicators.ma5 < indicators.ma20 < indicators.ma60:
             signals.append("MA空头排列")
@@ -201,21 +746,7 @@ class TechnicalAnalyzer:
             signals.append("RSI超买")
 
         # 综合判断
-        if score >= 80:
-            signal = SignalType.STRONG_BUY
-            reason = "技术面全面向好"
-        elif score >= 65:
-            signal = SignalType.BUY
-            reason = "技术面偏强"
-        elif score >= 45:
-            signal = SignalType.HOLD
-            reason = "技术面中性"
-        elif score >= 30:
-            signal = SignalType.SELL
-            reason = "技术面偏弱"
-        else:
-            signal = SignalType.STRONG_SELL
-            reason = "技术面全面走弱"
+        signal, reason = _SIGNAL_TABLE[bisect_right(_SIGNAL_BREAKS, score)]
 
         return {
             "signal": signal,
@@ -225,69 +756,102 @@ class TechnicalAnalyzer:
             "details": signals
         }
 
-    def _sma(self, series: pd.Series, period: int) -> float:
-        """简单移动平均"""
-        if len(series) < period:
-            return None
-        return series.iloc[-period:].mean()
-
-    def _ema(self, series: pd.Series, period: int) -> float:
-        """指数移动平均"""
-        if len(series) < period:
-            return None
-        return series.ewm(span=period, adjust=False).mean().iloc[-1]
-
-    def _macd(self, close: pd.Series, fast: int = 12, slow: int = 26, signal_period: int = 9) -> Tuple[pd.Series, pd.Series, pd.Series]:
-        """MACD计算"""
-        ema_fast = close.ewm(span=fast, adjust=False)
-        ema_slow = close.ewm(span=slow, adjust=False)
-
-        macd_line = ema_fast.mean() - ema_slow.mean()
-        signal_line = macd_line.ewm(span=signal_period, adjust=False).mean()
-        histogram = macd_line - signal_line
-
-        return macd_line, signal_line, histogram
-
-    def _rsi(self, series: pd.Series, period: int) -> float:
-        """RSI计算"""
-        if len(series) < period + 1:
-            return 50.0
+    def generate_signal_batch(self, batch: IndicatorsBatch) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量生成交易信号，只给出信号编码与评分，不生成理由文字
 
-        delta = series.diff()
-        gain = delta.where(delta > 0, 0)
-        loss = (-delta).where(delta < 0, 0)
+        Args:
+            batch: calculate_batch 的结果
 
-        avg_gain = gain.rolling(window=period).mean()
-        avg_loss = loss.rolling(window=period).mean()
+        Returns:
+            (int8 信号编码数组（见 SignalCode）, int16 评分数组)，数据不足的股票为 HOLD
+        """
+        codes = _SIGNAL_CODE_TABLE[np.searchsorted(_SIGNAL_BREAKS, batch.score, side='right')]
+        codes[np.isnan(batch.ma5)] = SignalCode.HOLD
+        return codes, batch.score
 
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
+    def _sma_all(self, arr: np.ndarray, periods: Tuple[int, ...]) -> Tuple[Optional[float], ...]:
+        """
+        多周期简单移动平均（最新值）
 
-        return rsi.iloc[-1] if not pd.isna(rsi.iloc[-1]) else 50.0
+        只对最长周期的尾部做一次前缀和，各周期均线 = (末项前缀和 - 倒数第 p+1 项) / p；
+        数据不足的周期为 None。
+        """
+        tail = arr[-max(periods):]
+        csum = np.concatenate(([0.0], np.cumsum(tail)))
+        total = float(csum[-1])
+        return tuple((total - float(csum[-1 - p])) / p if p <= tail.size else None for p in periods)
+
+    def _ema(self, arr: np.ndarray, period: int) -> float:
+        """指数移动平均（最新值）"""
+        if len(arr) < period:
+            return None
+        if not NUMBA_AVAILABLE and SCIPY_AVAILABLE:
+            return float(_ewma_lfilter(arr, 2 / (period + 1))[-1])
+        return _ewma_last(arr, 2 / (period + 1))
+
+    def _macd(self, close: np.ndarray, fast: int = 12, slow: int = 26, signal_period: int = 9) -> Tuple[float, float, float]:
+        """MACD计算，返回 (MACD, 信号线, 柱) 的最新值"""
+        if len(close) == 0:
+            return None, None, None
+        alphas = (2 / (fast + 1), 2 / (slow + 1), 2 / (signal_period + 1))
+        if not NUMBA_AVAILABLE and SCIPY_AVAILABLE:
+            return _macd_lfilter(close, *alphas)
+        return _macd_last(close, *alphas)
+
+    def _rsi_all(self, close: np.ndarray, periods: Tuple[int, ...]) -> Tuple[float, ...]:
+        """
+        多周期RSI计算（Wilder 平滑，最新值）
 
-    def _bollinger_bands(self, series: pd.Series, period: int = 20, std_dev: float = 2) -> Tuple[pd.Series, pd.Series, pd.Series]:
-        """布林带计算"""
-        middle = series.rolling(window=period).mean()
-        std = series.rolling(window=period).std()
+        Args:
+            close: 收盘价
+            periods: RSI周期
 
-        upper = middle + (std_dev * std)
-        lower = middle - (std_dev * std)
+        Returns:
+            与 periods 一一对应的RSI，数据不足或无涨跌时为 50
+        """
+        periods = np.asarray(periods, dtype=np.int64)
+        if NUMBA_AVAILABLE:
+            return tuple(_rsi_multi(close, periods).tolist())
+        return tuple(_rsi_multi_numpy(close, periods).tolist())
 
-        return upper, middle, lower
+    def _bollinger_bands(self, arr: np.ndarray, period: int = 20, std_dev: float = 2,
+                         middle: float = None) -> Tuple[float, float, float]:
+        """
+        布林带计算，返回最后一个窗口的 (上轨, 中轨, 下轨)，标准差取总体标准差
 
-    def _atr(self, high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> float:
-        """ATR计算"""
-        if len(high) < period + 1:
+        已算好同周期均线时可经 middle 传入，省去一次求均值。
+        """
+        if arr.size < period:
+            return None, None, None
+        tail = arr[-period:]
+        if middle is None:
+            middle = float(tail.mean())
+        std = float(np.sqrt(np.mean((tail - middle) ** 2)))
+        return middle + std_dev * std, middle, middle - std_dev * std
+
+    def _bollinger_series(self, arr: np.ndarray, period: int = 20, std_dev: float = 2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """布林带历史序列，只包含完整窗口（长度为 len(arr) - period + 1）"""
+        if arr.size < period:
+            empty = np.empty(0)
+            return empty, empty, empty
+        windows = np.lib.stride_tricks.sliding_window_view(arr, period)
+        middle = windows.mean(axis=1)
+        std = windows.std(axis=1)
+        return middle + std_dev * std, middle, middle - std_dev * std
+
+    def _true_range(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+        """真实波幅，从第二根K线开始（需要前收盘价），长度为 len(close) - 1"""
+        h = high[1:]
+        l = low[1:]
+        prev_close = close[:-1]
+        return np.maximum.reduce([h - l, np.abs(h - prev_close), np.abs(l - prev_close)])
+
+    def _atr(self, tr: np.ndarray, period: int = 14) -> float:
+        """ATR计算（最新值）"""
+        if len(tr) < period:
             return None
-
-        tr1 = high - low
-        tr2 = abs(high - close.shift(1))
-        tr3 = abs(low - close.shift(1))
-
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        atr = tr.rolling(window=period).mean()
-
-        return atr.iloc[-1]
+        return float(tr[-period:].mean())
 
     def _judge_trend(self, indicators: TechnicalIndicators) -> TrendType:
         """判断趋势"""
@@ -325,16 +889,192 @@ class TechnicalAnalyzer:
 
         # RSI
         if indicators.rsi12 is not None:
-            if 40 <= indicators.rsi12 <= 60:
-                score += 5
-            elif indicators.rsi12 > 70:
-                score -= 5
-            elif indicators.rsi12 < 30:
-                score += 5
+            score += _RSI_SCORE[bisect_right(_RSI_BREAKS, indicators.rsi12)]
 
         return max(min(score, 100), 0)
 
 
+class _RollingWindow:
+    """定长滑动窗口：环形缓冲区 + 滚动和/平方和，每次更新 O(1)"""
+
+    __slots__ = ('period', '_buf', '_head', '_count', '_sum', '_sum_sq')
+
+    def __init__(self, period: int):
+        self.period = period
+        self._buf = np.zeros(period)
+        self._head = 0
+        self._count = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    @property
+    def full(self) -> bool:
+        return self._count >= self.period
+
+    def update(self, value: float):
+        old = self._buf[self._head]
+        self._buf[self._head] = value
+        self._head += 1
+        if self._head == self.period:
+            self._head = 0
+        if self._count < self.period:
+            self._count += 1
+            self._sum += value
+            self._sum_sq += value * value
+        else:
+            self._sum += value - old
+            self._sum_sq += value * value - old * old
+        if self._head == 0:
+            # 每转一圈按缓冲区重算一次，避免滚动和的舍入误差累积
+            self._sum = self._buf.sum()
+            self._sum_sq = (self._buf * self._buf).sum()
+
+    def mean(self) -> Optional[float]:
+        """窗口均值，窗口未满时为 None"""
+        if not self.full:
+            return None
+        return self._sum / self.period
+
+    def std(self, ddof: int = 1) -> Optional[float]:
+        """窗口标准差，窗口未满时为 None"""
+        if not self.full:
+            return None
+        var = (self._sum_sq - self._sum * self._sum / self.period) / (self.period - ddof)
+        return max(var, 0.0) ** 0.5
+
+
+class IncrementalTechnicalAnalyzer(TechnicalAnalyzer):
+    """
+    增量技术分析器
+
+    逐根K线调用 update，各指标只维护滚动状态（均线窗口、EMA、Wilder 平均涨跌、
+    布林带窗口、前收盘价），每根K线 O(1) 更新；结果与对同一段历史调用
+    calculate_indicators 一致（浮点舍入误差以内）。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.reset()
+
+    def reset(self):
+        """清空全部状态"""
+        self._count = 0
+        self._close_ma = {p: _RollingWindow(p) for p in (5, 10, 20, 60, 120)}
+        self._volume_ma = {p: _RollingWindow(p) for p in (5, 10, 20)}
+        self._bollinger = _RollingWindow(20)
+
+        # MACD：快线、慢线、信号线
+        self._ema_fast = 0.0
+        self._ema_slow = 0.0
+        self._ema_signal = 0.0
+
+        # RSI：{周期: [已累计的涨跌个数, 平均涨幅, 平均跌幅]}，前 p 个涨跌取均值作初值
+        self._rsi_state = {p: [0, 0.0, 0.0] for p in (6, 12, 24)}
+
+        # ATR
+        self._prev_close = None
+        self._tr = {p: _RollingWindow(p) for p in (14, 10)}
+
+    def update(self, open_: float, high: float, low: float, close: float, vol: float) -> TechnicalIndicators:
+        """
+        追加一根K线并返回最新指标
+
+        Args:
+            open_: 开盘价
+            high: 最高价
+            low: 最低价
+            close: 收盘价
+            vol: 成交量
+
+        Returns:
+            TechnicalIndicators 对象，累计不足60根K线时为空指标
+        """
+        close = float(close)
+        self._count += 1
+
+        for window in self._close_ma.values():
+            window.update(close)
+        for window in self._volume_ma.values():
+            window.update(float(vol))
+        self._bollinger.update(close)
+
+        # MACD（首根K线以收盘价为初值）
+        if self._count == 1:
+            self._ema_fast = self._ema_slow = close
+            self._ema_signal = 0.0
+        else:
+            self._ema_fast += (close - self._ema_fast) * (2 / 13)
+            self._ema_slow += (close - self._ema_slow) * (2 / 27)
+            self._ema_signal += (self._ema_fast - self._ema_slow - self._ema_signal) * (2 / 10)
+
+        # RSI 与 ATR 需要前收盘价
+        if self._prev_close is not None:
+            delta = close - self._prev_close
+            gain = max(delta, 0.0)
+            loss = max(-delta, 0.0)
+            for period, state in self._rsi_state.items():
+                state[0] += 1
+                if state[0] <= period:
+                    state[1] += gain / period
+                    state[2] += loss / period
+                else:
+                    state[1] = (state[1] * (period - 1) + gain) / period
+                    state[2] = (state[2] * (period - 1) + loss) / period
+
+            tr = max(high - low, abs(high - self._prev_close), abs(low - self._prev_close))
+            for window in self._tr.values():
+                window.update(tr)
+        self._prev_close = close
+
+        if self._count < 60:
+            return TechnicalIndicators()
+        return self._snapshot(close, float(vol))
+
+    def _snapshot(self, close: float, vol: float) -> TechnicalIndicators:
+        """由当前状态生成指标"""
+        indicators = TechnicalIndicators()
+
+        indicators.ma5 = self._close_ma[5].mean()
+        indicators.ma10 = self._close_ma[10].mean()
+        indicators.ma20 = self._close_ma[20].mean()
+        indicators.ma60 = self._close_ma[60].mean()
+        indicators.ma120 = self._close_ma[120].mean()
+
+        indicators.macd = self._ema_fast - self._ema_slow
+        indicators.signal = self._ema_signal
+        indicators.histogram = indicators.macd - indicators.signal
+
+        rsi = []
+        for period, (count, avg_gain, avg_loss) in self._rsi_state.items():
+            if count < period:
+                rsi.append(50.0)
+            elif avg_loss > 0:
+                rsi.append(100 - 100 / (1 + avg_gain / avg_loss))
+            else:
+                rsi.append(100.0 if avg_gain > 0 else 50.0)
+        indicators.rsi6, indicators.rsi12, indicators.rsi24 = rsi
+
+        middle = self._bollinger.mean()
+        std = self._bollinger.std(ddof=0)
+        indicators.bollinger_upper = middle + 2 * std
+        indicators.bollinger_middle = middle
+        indicators.bollinger_lower = middle - 2 * std
+        indicators.bollinger_width = 4 * std / middle * 100 if middle > 0 else 0.0
+
+        indicators.atr14 = self._tr[14].mean()
+        indicators.atr10 = self._tr[10].mean()
+
+        indicators.volume_ma5 = self._volume_ma[5].mean()
+        indicators.volume_ma10 = self._volume_ma[10].mean()
+        indicators.volume_ma20 = self._volume_ma[20].mean()
+        indicators.volume_ratio = vol / indicators.volume_ma20 if indicators.volume_ma20 > 0 else 1.0
+        indicators.last_close = close
+
+        indicators.trend = self._judge_trend(indicators)
+        indicators.score = self._calc_comprehensive_score(indicators)
+        return indicators
+
+
 if __name__ == "__main__":
     # 测试代码
     print("=" * 60)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""AI选股因子计算测试"""
+
+import dataclasses
+
+import numpy as np
+import pytest
+
+from src.strategies import ai_stock_picker
+from src.strategies.ai_stock_picker import (
+    FactorMetrics, _all_metrics_numpy, _batch_metrics_numpy, NUMBA_AVAILABLE,
+)
+
+requires_numba = pytest.mark.skipif(not NUMBA_AVAILABLE, reason="未安装 numba")
+
+
+def _make_matrices(seed: int = 0, n_sym: int = 6, t: int = 80):
+    """右对齐、左侧补 NaN 的收盘价/成交量矩阵，第 0 行最近 20 日成交量为 0，第 1 行有一个 0 收盘价"""
+    rng = np.random.default_rng(seed)
+    closes = 10 + np.cumsum(rng.normal(0, 0.2, (n_sym, t)), axis=1)
+    vols = rng.uniform(1e5, 1e6, (n_sym, t))
+    lengths = np.array([t, t, 30, 45, 60, t], dtype=np.int64)[:n_sym]
+    for i, n in enumerate(lengths):
+        closes[i, :t - n] = np.nan
+        vols[i, :t - n] = np.nan
+    vols[0, -20:] = 0.0
+    closes[1, -2] = 0.0
+    return closes, vols, lengths
+
+
+@requires_numba
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_numba_kernel_matches_numpy_fallback():
+    """单股内核与 NumPy 实现在正常行与除零行上结果一致"""
+    closes, vols, lengths = _make_matrices()
+    t = closes.shape[1]
+    for i, n in enumerate(lengths):
+        close = np.ascontiguousarray(closes[i, t - n:])
+        vol = np.ascontiguousarray(vols[i, t - n:])
+        kernel = dataclasses.astuple(FactorMetrics(*ai_stock_picker._all_metrics_kernel(close, vol)))
+        expected = dataclasses.astuple(_all_metrics_numpy(close, vol))
+        np.testing.assert_allclose(kernel, expected, rtol=1e-9, equal_nan=True)
+
+
+@requires_numba
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_batch_kernel_matches_numpy_fallback():
+    """批量内核与批量 NumPy 实现一致，除零行不会抛异常或留下未初始化的值"""
+    closes, vols, lengths = _make_matrices()
+    kernel = ai_stock_picker._batch_metrics_kernel(closes, vols, lengths)
+    expected = np.column_stack(dataclasses.astuple(_batch_metrics_numpy(closes, vols, lengths)))
+    np.testing.assert_allclose(kernel, expected, rtol=1e-9, equal_nan=True)
+    assert np.isnan(kernel[0, 7])  # 成交量全为 0：量比为 NaN
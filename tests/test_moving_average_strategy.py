@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""均线策略测试"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.strategies.moving_average_strategy import MovingAverageStrategy, BUY, SELL, HOLD
+from src.utils import ma_kernels
+
+requires_numba = pytest.mark.skipif(not ma_kernels.NUMBA_AVAILABLE, reason="未安装 numba")
+
+
+class _ReplayAPI:
+    """按"当前日期"返回可见历史的假数据源，用于逐日重放 generate_signal"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.today = 0
+
+    def get_daily_price(self, symbol, start_date=None):
+        visible = self.df.iloc[:self.today + 1]
+        if start_date is not None:
+            visible = visible[visible['trade_date'] >= start_date]
+        return visible
+
+
+def _make_prices(seed: int, n: int = 300) -> pd.DataFrame:
+    """两位小数的随机价格，均线恰好相等的情形较多"""
+    rng = np.random.default_rng(seed)
+    close = np.round(10 + np.cumsum(rng.choice([-0.02, -0.01, 0.0, 0.01, 0.02], n)), 2)
+    dates = pd.date_range('2020-01-01', periods=n, freq='D').strftime('%Y%m%d')
+    return pd.DataFrame({'trade_date': dates, 'close': close})
+
+
+def test_signal_vector_matches_per_bar_replay():
+    """generate_signal_vector 与逐日调用 generate_signal 给出相同的买卖点"""
+    for seed in range(20):
+        df = _make_prices(seed)
+        api = _ReplayAPI(df)
+        strategy = MovingAverageStrategy(api, short_ma=5, long_ma=20)
+
+        replay = []
+        for day in range(len(df)):
+            api.today = day
+            replay.append(strategy.generate_signal('000001')['signal_int'])
+
+        # 向量信号只表示交叉，按 generate_signal 的持仓规则过滤
+        expected, long = [], False
+        for code in strategy.generate_signal_vector(df):
+            if code == BUY and not long:
+                long = True
+                expected.append(BUY)
+            elif code == SELL and long:
+                long = False
+                expected.append(SELL)
+            else:
+                expected.append(HOLD)
+
+        assert replay == expected, seed
+
+
+def test_state_skips_fetch_when_no_new_bars():
+    """当天已确认没有新K线后，重复调用不再请求数据源"""
+    api = _ReplayAPI(_make_prices(0))
+    api.today = 100
+    calls = []
+    fetch = api.get_daily_price
+    api.get_daily_price = lambda symbol, start_date=None: calls.append(start_date) or fetch(symbol, start_date)
+    strategy = MovingAverageStrategy(api, short_ma=5, long_ma=20)
+
+    for _ in range(5):
+        strategy.generate_signal('000001')
+
+    # 首次取完整历史，第二次确认没有新K线，之后直接使用状态
+    assert calls == [None, api.df['trade_date'].iloc[100]]
+
+
+def test_state_resets_when_adjusted_prices_change():
+    """前复权价整体重算（重叠K线收盘价变化）时丢弃状态，按新价格重新计算"""
+    df = _make_prices(1)
+    api = _ReplayAPI(df)
+    api.today = 150
+    strategy = MovingAverageStrategy(api, short_ma=5, long_ma=20)
+    strategy.generate_signal('000001')
+
+    # 除权后历史价格按比例下调，并新增一根K线
+    api.df = df.assign(close=np.round(df['close'] * 0.9, 2))
+    api.today = 151
+    state = strategy._update_state('000001')
+
+    expected = ma_kernels.last_cross(api.df['close'].to_numpy(dtype=np.float64)[:152], 5, 20)
+    assert state['n'] == 152
+    assert state['close'] == api.df['close'].iloc[151]
+    assert (state['cross'], state['ma_short'], state['ma_long']) == expected
+
+
+@requires_numba
+def test_numba_kernel_matches_numpy_fallback():
+    """numba 内核与 NumPy 回退的交叉信号逐位一致（含长序列与均线恰好相等的K线）"""
+    for seed in range(20):
+        close = _make_prices(seed, n=300 if seed % 2 else 20000)['close'].to_numpy(dtype=np.float64)
+        for short, long in ((5, 20), (3, 7), (10, 60)):
+            expected = ma_kernels._ma_cross_numpy(close, short, long)
+            assert np.array_equal(ma_kernels._ma_cross_kernel(close, short, long), expected), seed
+
+
+def test_batch_cross_matches_per_row(monkeypatch):
+    """批量交叉判定（右对齐补 NaN）与逐行计算整段信号后取最后一根一致，两种实现均如此"""
+    rows = [_make_prices(seed, n=n)['close'].to_numpy(dtype=np.float64)
+            for seed, n in enumerate((300, 120, 40, 25, 300, 5))]
+    closes = np.full((len(rows), 300), np.nan)
+    for i, row in enumerate(rows):
+        closes[i, 300 - len(row):] = row
+    expected = np.array([ma_kernels._ma_cross_numpy(row, 5, 20)[-1] for row in rows], dtype=np.int8)
+
+    assert np.array_equal(ma_kernels.batch_ma_cross(closes, 5, 20), expected)
+    monkeypatch.setattr(ma_kernels, "NUMBA_AVAILABLE", False)
+    assert np.array_equal(ma_kernels.batch_ma_cross(closes, 5, 20), expected)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""风险管理器测试"""
+
+import numpy as np
+
+from src.utils.risk_manager import RiskManager
+
+
+def _assert_mirror_consistent(rm: RiskManager):
+    """列式镜像与持仓字典逐项一致"""
+    assert sorted(rm._symbols) == sorted(rm.positions)
+    assert all(rm._symbols[i] == symbol for symbol, i in rm._sym_idx.items())
+    for symbol, position in rm.positions.items():
+        i = rm._sym_idx[symbol]
+        assert rm._cost[i] == position.cost_price
+        assert rm._shares[i] == position.shares
+        assert rm._target_weight[i] == position.target_weight
+    assert abs(rm._get_total_weight() - sum(p.target_weight for p in rm.positions.values())) < 1e-12
+
+
+def test_position_mirror_tracks_random_add_remove():
+    """随机增删（含重复建仓与扩容）后镜像仍与持仓字典一致"""
+    rng = np.random.default_rng(0)
+    rm = RiskManager(max_position_count=100)
+    symbols = [f"{i:06d}" for i in range(30)]
+    for _ in range(500):
+        symbol = symbols[rng.integers(len(symbols))]
+        if symbol in rm.positions and rng.random() < 0.5:
+            rm.remove_position(symbol, float(rng.uniform(5, 15)))
+        else:
+            rm.add_position(symbol, int(rng.integers(1, 10)) * 100,
+                            float(rng.uniform(5, 15)), float(rng.uniform(0.01, 0.2)))
+        _assert_mirror_consistent(rm)
+
+
+def test_batch_check_stops_matches_scalar_checks():
+    """批量止损止盈判断与逐只 check_stop_loss / check_take_profit 一致"""
+    rng = np.random.default_rng(1)
+    rm = RiskManager(max_position_count=100)
+    for i in range(40):
+        rm.add_position(f"{i:06d}", 100, float(rng.uniform(5, 15)))
+    prices = {symbol: float(rm.positions[symbol].cost_price * rng.uniform(0.8, 1.3))
+              for symbol in list(rm.positions)[::2]}
+    prices['999999'] = 10.0  # 未持仓的股票不参与判断
+
+    triggered = rm.batch_check_stops(prices)
+
+    expected = {}
+    for symbol, price in prices.items():
+        if rm.check_stop_loss(symbol, price):
+            expected[symbol] = 'stop_loss'
+        elif rm.check_take_profit(symbol, price):
+            expected[symbol] = 'take_profit'
+    assert triggered == expected
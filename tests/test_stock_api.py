@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""股票数据接口测试"""
+
+import pytest
+
+from src.data.stock_api import StockDataAPI
+
+
+def _sina_line(code: str, name: str, nums: str) -> str:
+    return f'var hq_str_{code}="{name},{nums},";\n'
+
+
+@pytest.mark.filterwarnings("error::DeprecationWarning")
+def test_parse_quotes_skips_unparsable_rows():
+    """停牌股票的数值字段为 "--" 时只跳过该股票，其余正常解析"""
+    api = StockDataAPI(data_source="sina")
+    text = (_sina_line("sh600000", "浦发银行", "10.00,9.90,10.10,10.20,9.80,10.10,10.11,100000,1010000")
+            + _sina_line("sz000001", "平安银行", "--,--,--,--,--,0,0,0,0"))
+
+    quotes = api._parse_quotes(text)
+
+    assert list(quotes) == ["600000"]
+    quote = quotes["600000"]
+    assert quote["close"] == 10.10
+    assert quote["pre_close"] == 9.90
+    assert quote["volume"] == 100000
+    assert abs(quote["change_pct"] - (10.10 - 9.90) / 9.90 * 100) < 1e-9
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""技术指标测试：编译内核、批量路径、增量路径与 NumPy 回退的结果一致"""
+
+import dataclasses
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils import technical_analysis
+from src.utils.technical_analysis import (
+    TechnicalAnalyzer, IncrementalTechnicalAnalyzer, TechnicalIndicators, SignalCode, SignalType,
+)
+
+requires_numba = pytest.mark.skipif(not technical_analysis.NUMBA_AVAILABLE, reason="未安装 numba")
+
+_SIGNAL_CODE = {
+    SignalType.STRONG_SELL: SignalCode.STRONG_SELL,
+    SignalType.SELL: SignalCode.SELL,
+    SignalType.HOLD: SignalCode.HOLD,
+    SignalType.BUY: SignalCode.BUY,
+    SignalType.STRONG_BUY: SignalCode.STRONG_BUY,
+}
+
+
+def _make_bars(seed: int, n: int) -> pd.DataFrame:
+    """两位小数的随机K线，seed 为 3 的倍数时成交量列名为 'volume'"""
+    rng = np.random.default_rng(seed)
+    close = np.round(20 * np.exp(np.cumsum(rng.normal(0.001, 0.02, n))), 2)
+    open_ = np.round(close * (1 + rng.normal(0, 0.01, n)), 2)
+    high = np.round(np.maximum(close, open_) * (1 + rng.uniform(0, 0.02, n)), 2)
+    low = np.round(np.minimum(close, open_) * (1 - rng.uniform(0, 0.02, n)), 2)
+    vol = rng.integers(10 ** 5, 10 ** 7, n).astype(np.float64)
+    df = pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close, 'vol': vol})
+    return df.rename(columns={'vol': 'volume'}) if seed % 3 == 0 else df
+
+
+def _assert_same(expected: TechnicalIndicators, actual: TechnicalIndicators, rtol: float = 1e-8):
+    for field in dataclasses.fields(TechnicalIndicators):
+        x, y = getattr(expected, field.name), getattr(actual, field.name)
+        if isinstance(x, float) and y is not None:
+            assert math.isclose(x, y, rel_tol=rtol, abs_tol=rtol), (field.name, x, y)
+        else:
+            assert x == y, (field.name, x, y)
+
+
+@requires_numba
+@pytest.mark.parametrize("n", [60, 61, 120, 121, 250])
+def test_numba_kernel_matches_numpy_fallback(monkeypatch, n):
+    """编译内核与未安装 numba 时的 NumPy/SciPy 实现一致"""
+    analyzer = TechnicalAnalyzer()
+    for seed in range(10):
+        df = _make_bars(seed, n)
+        expected = analyzer.calculate_indicators(df)
+        with monkeypatch.context() as m:
+            m.setattr(technical_analysis, "NUMBA_AVAILABLE", False)
+            actual = analyzer.calculate_indicators(df)
+        _assert_same(expected, actual)
+
+
+def test_batch_matches_scalar():
+    """批量计算与逐只计算一致，历史不足或缺数据的股票为空指标"""
+    analyzer = TechnicalAnalyzer()
+    data = {f"{seed}-{n}": _make_bars(seed, n) for seed in range(6) for n in (30, 59, 60, 121, 250)}
+    data['empty'] = None
+
+    batch = analyzer.calculate_indicators_batch(data)
+
+    for symbol, df in data.items():
+        _assert_same(analyzer.calculate_indicators(df), batch[symbol])
+
+
+def test_generate_signal_batch_matches_scalar():
+    """批量信号编码与评分与逐只 generate_signal 一致"""
+    analyzer = TechnicalAnalyzer()
+    data = {f"{seed}-{n}": _make_bars(seed, n) for seed in range(10) for n in (30, 60, 250)}
+
+    codes, scores = analyzer.generate_signal_batch(analyzer.calculate_batch(data))
+
+    assert codes.dtype == np.int8 and scores.dtype == np.int16
+    for i, df in enumerate(data.values()):
+        result = analyzer.generate_signal(df)
+        assert codes[i] == _SIGNAL_CODE[result['signal']]
+        if 'score' in result:
+            assert scores[i] == result['score']
+
+
+def test_incremental_matches_batch():
+    """逐根K线增量更新的结果与对截至当根的完整历史重新计算一致"""
+    analyzer = TechnicalAnalyzer()
+    for seed in range(3):
+        df = _make_bars(seed, 260)
+        vol_col = 'vol' if 'vol' in df.columns else 'volume'
+        incremental = IncrementalTechnicalAnalyzer()
+        for i, row in enumerate(df.itertuples()):
+            actual = incremental.update(row.open, row.high, row.low, row.close, getattr(row, vol_col))
+            if i + 1 in (59, 60, 61, 120, 121, 260):
+                _assert_same(analyzer.calculate_indicators(df.iloc[:i + 1]), actual)
+
+
+def test_zero_closes_do_not_raise():
+    """停牌补零的K线不会因除零而抛异常"""
+    df = _make_bars(1, 100)
+    df[['open', 'high', 'low', 'close']] = 0.0
+    assert TechnicalAnalyzer().calculate_indicators(df).bollinger_width == 0.0